@@ -0,0 +1,38 @@
+"""Синтетические данные для бенчмарков: ряды с пропусками и входы lab1.
+
+Все генераторы детерминированы по seed, поэтому результаты разных
+коммитов сравнимы между собой.
+"""
+from pathlib import Path
+
+import numpy as np
+
+
+def make_series(n, nan_ratio, gap_length=1, seed=0):
+    """Ряд длины n, где примерно nan_ratio точек — NaN сериями по gap_length"""
+    rng = np.random.default_rng(seed)
+    x = np.arange(1, n + 1)
+    y = rng.uniform(0, 250, n)
+    starts = rng.random(n) < nan_ratio / gap_length
+    y[np.convolve(starts, np.ones(gap_length), 'full')[:n] > 0] = np.nan
+    return x, y
+
+
+def make_table(n, columns, nan_ratio, seed=0):
+    """Таблица (x, значения формы (n, columns)) с NaN в доле nan_ratio клеток"""
+    rng = np.random.default_rng(seed)
+    x = np.cumsum(rng.uniform(0.5, 1.5, n))
+    values = rng.uniform(-50, 50, (n, columns))
+    values[rng.random((n, columns)) < nan_ratio] = np.nan
+    return x, values
+
+
+def write_lab1_dataset(directory, n, files=4, seed=0):
+    """Каталог как lab1/data: xc.dat и yc-1.dat ... yc-<files>.dat по n значений"""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    np.savetxt(directory / 'xc.dat', np.linspace(0.2, 0.2 + 0.1 * (n - 1), n), fmt='%.15g')
+    for i in range(1, files + 1):
+        np.savetxt(directory / f'yc-{i}.dat', rng.uniform(-10, 10, n), fmt='%.15g')
+    return directory
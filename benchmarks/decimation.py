@@ -0,0 +1,50 @@
+"""Прореживание перед отрисовкой: время построения и размер PNG.
+
+Строит график gm (plot_interpolation) для длинного ряда с пропусками
+без прореживания и с разными max_points. Выигрыш — во времени
+построения; PNG после прореживания может стать больше: сотни тысяч
+точек сливаются в сплошные полосы, которые хорошо сжимаются, а
+отдельные маркеры и штрихи — хуже (на 200 000 точках: 198 КБ без
+прореживания, 477 КБ при max_points=2000).
+
+Запуск из корня репозитория:
+    python -m benchmarks.decimation --size 1000000 --max-points 2000 10000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import matplotlib
+
+matplotlib.use('Agg')
+
+from benchmarks.data import make_series  # noqa: E402
+from gm.main import linear_interpolation_np, plot_interpolation, quadratic_interpolation_np  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size', type=int, default=1_000_000)
+    parser.add_argument('--nan-ratio', type=float, default=0.01)
+    parser.add_argument('--gap-length', type=int, default=5)
+    parser.add_argument('--max-points', type=int, nargs='+', default=[2_000, 10_000])
+    args = parser.parse_args()
+
+    x, y = make_series(args.size, args.nan_ratio, args.gap_length)
+    y_linear, _ = linear_interpolation_np(x, y, details=False)
+    y_quad, _ = quadratic_interpolation_np(x, y, details=False)
+
+    print(f"{'max_points':>10} {'сек.':>8} {'PNG, КБ':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for max_points in [None, *args.max_points]:
+            path = os.path.join(tmp, f"plot-{max_points}.png")
+            t0 = time.perf_counter()
+            plot_interpolation(x, y, y_linear, y_quad, path, max_points)
+            elapsed = time.perf_counter() - t0
+            label = 'все' if max_points is None else max_points
+            print(f"{label:>10} {elapsed:>8.2f} {os.path.getsize(path) / 1024:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
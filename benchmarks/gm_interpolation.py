@@ -0,0 +1,50 @@
+"""Масштабирование интерполяции gm: исходные функции против векторизованных.
+
+Запуск из корня репозитория:
+    python -m benchmarks.gm_interpolation --sizes 1000 10000 100000 1000000
+"""
+import argparse
+import time
+
+from benchmarks.data import make_series
+from gm.main import (
+    linear_interpolation,
+    linear_interpolation_np,
+    quadratic_interpolation,
+    quadratic_interpolation_np,
+)
+
+
+def timed(func, *args):
+    t0 = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 10_000, 100_000, 1_000_000])
+    parser.add_argument('--nan-ratio', type=float, default=0.1)
+    parser.add_argument('--gap-length', type=int, default=1, help='длина серий NaN')
+    parser.add_argument('--max-reference', type=int, default=10_000,
+                        help='исходные функции запускаются только до этого размера')
+    args = parser.parse_args()
+
+    print(f"{'n':>10} {'метод':>10} {'исходная, с':>14} {'numpy, с':>10} {'ускорение':>10}")
+    for n in args.sizes:
+        x, y = make_series(n, args.nan_ratio, args.gap_length)
+        x_list, y_list = x.tolist(), y.tolist()
+        for name, reference, fast in (
+            ('linear', linear_interpolation, linear_interpolation_np),
+            ('quadratic', quadratic_interpolation, quadratic_interpolation_np),
+        ):
+            t_fast = timed(fast, x, y)
+            if n <= args.max_reference:
+                t_ref = timed(reference, x_list, y_list)
+                print(f"{n:>10} {name:>10} {t_ref:>14.4f} {t_fast:>10.4f} {t_ref / t_fast:>9.1f}x")
+            else:
+                print(f"{n:>10} {name:>10} {'-':>14} {t_fast:>10.4f} {'-':>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""Чтение .dat в lab1: текст через open, np.loadtxt и бинарный кэш .npy.
+
+Запуск из корня репозитория:
+    python -m benchmarks.lab1_load --sizes 1000 100000 1000000
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from lab1.main import clear_cache, load_cached, load_data
+
+
+def timed(func, *args, repeat=3):
+    """Лучшее из repeat запусков; сумма заставляет реально прочитать mmap"""
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        float(np.sum(func(*args)))
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 100_000, 1_000_000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'n':>10} {'open, с':>10} {'np, с':>10} {'кэш холодный, с':>16} {'кэш тёплый, с':>14}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.sizes:
+            path = Path(tmp) / f"yc-{n}.dat"
+            np.savetxt(path, np.random.default_rng(n).uniform(-10, 10, n), fmt='%.15g')
+
+            t_open = timed(load_data, path, 'open', repeat=args.repeat)
+            t_np = timed(load_data, path, 'np', repeat=args.repeat)
+            clear_cache(tmp)
+            t_cold = timed(load_cached, path, True, repeat=1)
+            t_warm = timed(load_cached, path, repeat=args.repeat)
+            print(f"{n:>10} {t_open:>10.4f} {t_np:>10.4f} {t_cold:>16.4f} {t_warm:>14.6f}")
+
+
+if __name__ == "__main__":
+    main()
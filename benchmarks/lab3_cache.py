@@ -0,0 +1,70 @@
+"""cache_decorator из lab3 против functools.lru_cache.
+
+Запуск из корня репозитория:
+    python -m benchmarks.lab3_cache --calls 200000
+"""
+import argparse
+import functools
+import random
+import time
+
+from lab3.main import cache_decorator
+
+
+def square(x):
+    return x * x
+
+
+def variants(maxsize):
+    return {
+        'functools.lru_cache': functools.lru_cache(maxsize=maxsize)(square),
+        'cache_decorator': cache_decorator(maxsize=maxsize)(square),
+        'cache_decorator ttl': cache_decorator(maxsize=maxsize, ttl=60)(square),
+        'cache_decorator lock': cache_decorator(maxsize=maxsize, thread_safe=True)(square),
+    }
+
+
+def fibonacci_time(decorate, n, repeat):
+    @decorate
+    def fibonacci(k):
+        return k if k <= 1 else fibonacci(k - 1) + fibonacci(k - 2)
+
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fibonacci.cache_clear()
+        fibonacci(n)
+    return time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--calls', type=int, default=200_000)
+    parser.add_argument('--maxsize', type=int, default=1024)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    workloads = {
+        'попадания': [rng.randrange(args.maxsize // 2) for _ in range(args.calls)],
+        'промахи': [rng.randrange(args.maxsize * 8) for _ in range(args.calls)],
+    }
+
+    print(f"{'нагрузка':>10} {'вариант':>22} {'мкс/вызов':>10} {'hit rate':>9}")
+    for workload, keys in workloads.items():
+        for name, func in variants(args.maxsize).items():
+            t0 = time.perf_counter()
+            for key in keys:
+                func(key)
+            elapsed = time.perf_counter() - t0
+            info = func.cache_info()
+            print(f"{workload:>10} {name:>22} {elapsed / args.calls * 1e6:>10.3f} "
+                  f"{info.hits / (info.hits + info.misses):>9.2%}")
+
+    for name, decorate in (
+        ('functools.lru_cache', functools.lru_cache(maxsize=args.maxsize)),
+        ('cache_decorator', cache_decorator(maxsize=args.maxsize)),
+    ):
+        print(f"fibonacci(300) x100, {name}: {fibonacci_time(decorate, 300, 100):.4f} сек.")
+
+
+if __name__ == "__main__":
+    main()
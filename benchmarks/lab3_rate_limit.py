@@ -0,0 +1,82 @@
+"""Конкуренция за rate_limit из lab3 при большом числе потоков.
+
+Сравнивает прежний вариант (пересборка списка под общей блокировкой)
+со скользящим окном на deque, token bucket и лимитом по ключу.
+
+Запуск из корня репозитория:
+    python -m benchmarks.lab3_rate_limit --threads 1 8 32 --calls 20000
+"""
+import argparse
+import functools
+import time
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+
+from lab3.main import RATE_LIMITED, rate_limit
+
+
+def list_rate_limit(max_calls, period):
+    """Прежняя реализация rate_limit — для сравнения, без print"""
+    lock = Lock()
+
+    def decorator(func):
+        calls = []
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            now = time.time()
+            with lock:
+                nonlocal calls
+                calls = [call for call in calls if now - call < period]
+                if len(calls) < max_calls:
+                    calls.append(now)
+                    return func(*args, **kwargs)
+            return RATE_LIMITED
+        return wrapper
+    return decorator
+
+
+def noop(user_id):
+    return user_id
+
+
+def variants(max_calls, period):
+    return {
+        'list (прежний)': list_rate_limit(max_calls, period)(noop),
+        'window': rate_limit(max_calls, period, on_reject='sentinel')(noop),
+        'bucket': rate_limit(max_calls, period, strategy='bucket', on_reject='sentinel')(noop),
+        'window по ключу': rate_limit(max_calls, period, key=lambda user_id: user_id,
+                                      on_reject='sentinel')(noop),
+    }
+
+
+def hammer(func, threads, calls):
+    per_thread = calls // threads
+
+    def worker(user_id):
+        for _ in range(per_thread):
+            func(user_id)
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(worker, range(threads)))
+    return time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 8, 32])
+    parser.add_argument('--calls', type=int, default=20_000, help='всего вызовов на запуск')
+    parser.add_argument('--max-calls', type=int, default=5_000)
+    parser.add_argument('--period', type=float, default=60.0)
+    args = parser.parse_args()
+
+    print(f"{'потоков':>8} {'вариант':>18} {'сек.':>8} {'мкс/вызов':>10}")
+    for threads in args.threads:
+        for name, func in variants(args.max_calls, args.period).items():
+            elapsed = hammer(func, threads, args.calls)
+            print(f"{threads:>8} {name:>18} {elapsed:>8.3f} {elapsed / args.calls * 1e6:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
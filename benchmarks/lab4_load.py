@@ -0,0 +1,150 @@
+"""Нагрузочный прогон бота lab4 без Telegram.
+
+Синтетические Message и CallbackQuery подаются прямо в Dispatcher
+(dp.feed_update), а запросы бота к Bot API уходят на локальный
+поддельный сервер aiohttp. Печатает обновлений в секунду и p50/p99
+задержки для play_handler, stats_handler и callback_handler и проверяет,
+что сообщения в один чат уходят не чаще per_chat_interval.
+
+Запуск из корня репозитория:
+    python -m benchmarks.lab4_load --updates 5000 --concurrency 100
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import random
+import time
+
+from aiohttp import web
+
+os.environ.setdefault("API_TOKEN", "123456:LOADTEST")
+
+from aiogram import Bot  # noqa: E402
+from aiogram.client.session.aiohttp import AiohttpSession  # noqa: E402
+from aiogram.client.telegram import TelegramAPIServer  # noqa: E402
+from aiogram.types import CallbackQuery, Chat, Message, Update, User  # noqa: E402
+
+from lab4.main import dp, outbound  # noqa: E402
+
+
+class FakeBotAPI:
+    """Отвечает на любой метод Bot API как Telegram, ничего не отправляя"""
+
+    def __init__(self):
+        self.calls = {}
+        self.message_ids = itertools.count(1)
+        self.sent_at = {}
+
+    async def handle(self, request):
+        method = request.match_info["method"]
+        self.calls[method] = self.calls.get(method, 0) + 1
+        data = await request.post()
+        if method == "sendMessage":
+            # Через очередь уходят только результаты игры
+            if data.get("text", "").startswith("Вы: "):
+                self.sent_at.setdefault(int(data["chat_id"]), []).append(time.perf_counter())
+            result = {
+                "message_id": next(self.message_ids),
+                "date": int(time.time()),
+                "chat": {"id": int(data["chat_id"]), "type": "private"},
+                "text": data.get("text", ""),
+            }
+        else:
+            result = True
+        return web.json_response({"ok": True, "result": result})
+
+    async def start(self, host="127.0.0.1", port=0):
+        app = web.Application()
+        app.router.add_post("/bot{token}/{method}", self.handle)
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, host, port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        return f"http://{host}:{port}"
+
+    async def stop(self):
+        await self.runner.cleanup()
+
+
+def make_update(update_id, kind, user_id):
+    user = User(id=user_id, is_bot=False, first_name="Load")
+    chat = Chat(id=user_id, type="private")
+    message = Message(message_id=update_id, date=int(time.time()), chat=chat, from_user=user,
+                      text={"play": "/play", "stats": "/stats"}.get(kind, "Сделайте свой выбор:"))
+    if kind == "callback":
+        callback = CallbackQuery(id=str(update_id), from_user=user, chat_instance="load",
+                                 data=random.choice(["rock", "scissors", "paper"]), message=message)
+        return Update(update_id=update_id, callback_query=callback)
+    return Update(update_id=update_id, message=message)
+
+
+HANDLERS = {"play": "play_handler", "stats": "stats_handler", "callback": "callback_handler"}
+
+
+def min_chat_gap(sent_at):
+    """Наименьший промежуток между двумя сообщениями в один чат"""
+    gaps = [b - a for times in sent_at.values() for a, b in zip(times, times[1:])]
+    return min(gaps, default=None)
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def run(updates, concurrency, users):
+    api = FakeBotAPI()
+    base = await api.start()
+    bot = Bot(token=os.environ["API_TOKEN"],
+              session=AiohttpSession(api=TelegramAPIServer.from_base(base)))
+    await dp.emit_startup(bot=bot)
+
+    kinds = random.choices(list(HANDLERS), weights=[1, 1, 4], k=updates)
+    latencies = {kind: [] for kind in HANDLERS}
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def feed(update_id, kind):
+        update = make_update(update_id, kind, random.randrange(1, users + 1))
+        async with semaphore:
+            t0 = time.perf_counter()
+            await dp.feed_update(bot, update)
+            latencies[kind].append(time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(feed(i, kind) for i, kind in enumerate(kinds, 1)))
+    elapsed = time.perf_counter() - t0
+
+    # Ответы на нажатия уходят через очередь; дожидаемся её вместе с остановкой
+    await dp.emit_shutdown(bot=bot)
+    drained = time.perf_counter() - t0
+    await bot.session.close()
+    await api.stop()
+
+    print(f"Обновлений: {updates} за {elapsed:.2f} сек. ({updates / elapsed:.0f} в сек.)")
+    print(f"Очередь исходящих опустела через {drained:.2f} сек.: {outbound.metrics()}")
+    print(f"Запросов к Bot API: {api.calls}")
+    gap = min_chat_gap(api.sent_at)
+    if gap is not None:
+        print(f"Наименьший интервал между сообщениями в чат: {gap:.3f} сек. "
+              f"(не меньше {outbound.per_chat_interval} сек.)")
+        assert gap >= outbound.per_chat_interval, "нарушен темп отправки в чат"
+    print(f"{'обработчик':>18} {'кол-во':>7} {'p50, мс':>8} {'p99, мс':>8}")
+    for kind, values in latencies.items():
+        if values:
+            print(f"{HANDLERS[kind]:>18} {len(values):>7} "
+                  f"{percentile(values, 0.5) * 1000:>8.2f} {percentile(values, 0.99) * 1000:>8.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--updates", type=int, default=5_000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--users", type=int, default=1_000)
+    args = parser.parse_args()
+    asyncio.run(run(args.updates, args.concurrency, args.users))
+
+
+if __name__ == "__main__":
+    main()
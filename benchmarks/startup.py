@@ -0,0 +1,58 @@
+"""Время запуска python-analytic и разбор -X importtime.
+
+Для каждой команды замеряет полный запуск `python -m python_analytic
+<команда> --help` (лучший из нескольких) и печатает модули верхнего
+уровня, дольше всего импортирующиеся при этом.
+
+Запуск из корня репозитория:
+    python -m benchmarks.startup --repeat 5 --top 8
+"""
+import argparse
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+COMMANDS = ['lab1', 'gm', 'lab2']
+
+
+def run(args, importtime=False):
+    cmd = [sys.executable, *(['-X', 'importtime'] if importtime else []), '-m', 'python_analytic', *args]
+    t0 = time.perf_counter()
+    result = subprocess.run(cmd, cwd=ROOT, capture_output=True, text=True, check=True)
+    return time.perf_counter() - t0, result.stderr
+
+
+def parse_importtime(stderr):
+    """{модуль верхнего уровня: накопленное время, мкс} из вывода -X importtime"""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # Отступ в имени — глубина вложенности; берём только прямые импорты
+        if name.startswith('  '):
+            continue
+        modules[name.strip()] = int(cumulative)
+    return modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--top', type=int, default=8)
+    args = parser.parse_args()
+
+    for command in [None, *COMMANDS]:
+        argv = [command, '--help'] if command else ['--help']
+        best = min(run(argv)[0] for _ in range(args.repeat))
+        modules = parse_importtime(run(argv, importtime=True)[1])
+        print(f"{command or 'python-analytic'}: {best * 1000:.0f} мс")
+        for name, cumulative in sorted(modules.items(), key=lambda item: -item[1])[:args.top]:
+            print(f"  {name:<30} {cumulative / 1000:>8.1f} мс")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,322 @@
+"""Набор бенчмарков lab1, gm и lab3 с машиночитаемыми результатами.
+
+Данные синтетические (benchmarks.data) и зависят только от размера,
+доли NaN и seed, поэтому JSON разных коммитов можно сравнивать:
+
+    python -m benchmarks.suite --output before.json
+    git checkout <другой коммит>
+    python -m benchmarks.suite --compare before.json --output after.json
+
+--only оставляет случаи, в имени которых есть подстрока (lab1, gm.quadratic...).
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+from benchmarks.data import make_series, make_table, write_lab1_dataset
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Имя случая -> (группа параметров, подготовка); подготовка возвращает
+# функцию без аргументов и число вызовов в одном её запуске
+CASES = {}
+
+
+def case(name, kind='size'):
+    """kind: 'size' — зависит от --sizes и --nan-ratio, 'calls' — от --calls,
+    'fixed' — один прогон без параметров"""
+    def register(setup):
+        CASES[name] = (kind, setup)
+        return setup
+    return register
+
+
+# lab1: чтение и обработка одного ряда
+
+def _lab1_file(ctx):
+    path = ctx['tmp'] / f"yc-single-{ctx['size']}.dat"
+    if not path.exists():
+        np.savetxt(path, np.random.default_rng(ctx['seed']).uniform(-10, 10, ctx['size']), fmt='%.15g')
+    return path
+
+
+def _load_case(mode):
+    def setup(ctx):
+        from lab1.main import load_data
+
+        path = _lab1_file(ctx)
+        if mode == 'cache':
+            load_data(path, 'cache')  # тёплый кэш
+        # Сумма заставляет реально прочитать mmap из кэша
+        return lambda: float(np.sum(load_data(path, mode))), 1
+    return setup
+
+
+for _mode in ('open', 'np', 'cache'):
+    case(f'lab1.load_data[{_mode}]')(_load_case(_mode))
+
+
+def _lab1_arrays(ctx):
+    rng = np.random.default_rng(ctx['seed'])
+    return np.linspace(0.2, 0.2 + 0.1 * (ctx['size'] - 1), ctx['size']), rng.uniform(-10, 10, ctx['size'])
+
+
+@case('lab1.compute_stats')
+def _(ctx):
+    from lab1.main import compute_stats
+    _, y = _lab1_arrays(ctx)
+    return lambda: compute_stats(y), 1
+
+
+@case('lab1.get_derivative')
+def _(ctx):
+    from lab1.main import get_derivative
+    x, y = _lab1_arrays(ctx)
+    return lambda: get_derivative(x, y), 1
+
+
+@case('lab1.calculate_area')
+def _(ctx):
+    from lab1.main import calculate_area
+    x, y = _lab1_arrays(ctx)
+    return lambda: calculate_area(x, y), 1
+
+
+@case('lab1.run_serial')
+def _(ctx):
+    from lab1.main import run_serial
+    data_dir = write_lab1_dataset(ctx['tmp'] / f"lab1-{ctx['size']}", ctx['size'], seed=ctx['seed'])
+    return lambda: run_serial(data_dir, 'np', 'text'), 1
+
+
+@case('lab1.run_incremental[2000 unchanged]', 'fixed')
+def _(ctx):
+    from lab1.main import run_incremental
+    data_dir = write_lab1_dataset(ctx['tmp'] / 'lab1-incremental', 10, files=2000, seed=ctx['seed'])
+    # Файлы «старые»: повторный запуск доверяет stat и ничего не хэширует
+    hour_ago = time.time() - 3600
+    for path in data_dir.iterdir():
+        os.utime(path, (hour_ago, hour_ago))
+    run_incremental(data_dir)
+    return lambda: run_incremental(data_dir), 1
+
+
+# gm: интерполяция ряда с пропусками
+
+def _gm_case(func_name, reference=False, **kwargs):
+    def setup(ctx):
+        import gm.main
+
+        if reference and ctx['size'] > ctx['max_reference']:
+            return None
+        func = getattr(gm.main, func_name)
+        x, y = make_series(ctx['size'], ctx['nan_ratio'], seed=ctx['seed'])
+        if reference:
+            x, y = x.tolist(), y.tolist()
+        return lambda: func(x, y, **kwargs), 1
+    return setup
+
+
+case('gm.linear[reference]')(_gm_case('linear_interpolation', reference=True))
+case('gm.quadratic[reference]')(_gm_case('quadratic_interpolation', reference=True))
+case('gm.linear[np]')(_gm_case('linear_interpolation_np', details=False))
+case('gm.quadratic[np]')(_gm_case('quadratic_interpolation_np', details=False))
+case('gm.quadratic[np,details]')(_gm_case('quadratic_interpolation_np'))
+case('gm.cubic_spline')(_gm_case('cubic_spline_interpolation', details=False))
+case('gm.piecewise_quadratic')(_gm_case('piecewise_quadratic_interpolation', details=False))
+
+
+@case('gm.quadratic[2d,100 cols]')
+def _(ctx):
+    from gm.main import quadratic_interpolation_2d
+    x, values = make_table(max(ctx['size'] // 100, 3), 100, ctx['nan_ratio'], seed=ctx['seed'])
+    return lambda: quadratic_interpolation_2d(x, values), 1
+
+
+# lab3: накладные расходы декораторов на один вызов
+
+def _calls_case(decorate):
+    def setup(ctx):
+        func = decorate(ctx)(lambda a, b: a + b)
+        calls = ctx['calls']
+
+        def run():
+            for i in range(calls):
+                func(i, 1)
+        return run, calls
+    return setup
+
+
+case('lab3.plain', 'calls')(_calls_case(lambda ctx: lambda func: func))
+
+
+@case('lab3.log_decorator', 'calls')
+def _(ctx):
+    from lab3.main import log_decorator
+    # log_decorator пишет в log.txt текущего каталога
+    os.chdir(ctx['tmp'])
+    return _calls_case(lambda _: log_decorator)(ctx)
+
+
+@case('lab3.buffered_log_decorator', 'calls')
+def _(ctx):
+    from lab3.main import LogWriter, buffered_log_decorator
+    writer = LogWriter(str(ctx['tmp'] / 'buffered.log'))
+    return _calls_case(lambda _: buffered_log_decorator(writer=writer))(ctx)
+
+
+@case('lab3.cache_decorator[hit]', 'calls')
+def _(ctx):
+    from lab3.main import cache_decorator
+    func = cache_decorator(maxsize=128)(lambda a: a + 1)
+    calls = ctx['calls']
+
+    def run():
+        for i in range(calls):
+            func(i & 63)
+    return run, calls
+
+
+@case('lab3.cache_decorator[miss]', 'calls')
+def _(ctx):
+    from lab3.main import cache_decorator
+    return _calls_case(lambda _: cache_decorator(maxsize=128))(ctx)
+
+
+for _strategy in ('window', 'bucket'):
+    @case(f'lab3.rate_limit[{_strategy}]', 'calls')
+    def _(ctx, strategy=_strategy):
+        from lab3.main import rate_limit
+        # Лимит заведомо больше числа вызовов: меряем учёт, а не отказы
+        limit = rate_limit(max_calls=10 * ctx['calls'] * (ctx['repeat'] + 1), period=3600,
+                           strategy=strategy, on_reject='sentinel')
+        return _calls_case(lambda _: limit)(ctx)
+
+
+@case('lab3.metrics_decorator', 'calls')
+def _(ctx):
+    from lab3.main import MetricsRegistry, metrics_decorator
+    return _calls_case(lambda _: metrics_decorator(registry=MetricsRegistry()))(ctx)
+
+
+def measure(run, calls, repeat):
+    run()  # прогрев: импорт, кэши, выделение памяти
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        run()
+        times.append((time.perf_counter() - t0) / calls)
+    return min(times), statistics.median(times)
+
+
+def git_commit():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=ROOT,
+                                    capture_output=True, text=True, check=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+    return commit, dirty
+
+
+def result_key(result):
+    return result['name'], result['size'], result['nan_ratio']
+
+
+def compare(results, baseline_file, threshold):
+    """Печатает отношение к прежнему прогону; возвращает число замедлений"""
+    with open(baseline_file, encoding='utf-8') as f:
+        baseline = {result_key(r): r for r in json.load(f)['results']}
+    slower = 0
+    print(f"\nСравнение с {baseline_file} (best, новое / прежнее):")
+    for result in results:
+        old = baseline.get(result_key(result))
+        if old is None:
+            continue
+        ratio = result['best'] / old['best']
+        mark = ''
+        if ratio > threshold:
+            mark, slower = '  медленнее', slower + 1
+        elif ratio < 1 / threshold:
+            mark = '  быстрее'
+        print(f"{result['name']:>32} {result['size'] or '':>9} {ratio:>7.2f}x{mark}")
+    return slower
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 100_000])
+    parser.add_argument('--nan-ratio', type=float, nargs='+', default=[0.1])
+    parser.add_argument('--calls', type=int, default=20_000, help='вызовов на запуск для lab3')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--max-reference', type=int, default=10_000,
+                        help='исходные функции gm запускаются только до этого размера')
+    parser.add_argument('--only', nargs='+', default=None, help='подстроки имён случаев')
+    parser.add_argument('--output', help='записать результаты в JSON')
+    parser.add_argument('--compare', help='JSON прежнего прогона для сравнения')
+    parser.add_argument('--threshold', type=float, default=1.2,
+                        help='во сколько раз медленнее считать замедлением')
+    args = parser.parse_args(argv)
+
+    cwd = os.getcwd()
+    results = []
+    print(f"{'случай':>32} {'n':>9} {'NaN':>5} {'best, с':>12} {'median, с':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, (kind, setup) in CASES.items():
+            if args.only and not any(part in name for part in args.only):
+                continue
+            grid = [(None, None)] if kind in ('calls', 'fixed') else [
+                (size, ratio) for size in args.sizes
+                for ratio in (args.nan_ratio if name.startswith('gm.') else [None])]
+            for size, ratio in grid:
+                ctx = {'tmp': Path(tmp), 'size': size, 'nan_ratio': ratio, 'seed': args.seed,
+                       'calls': args.calls, 'repeat': args.repeat, 'max_reference': args.max_reference}
+                try:
+                    prepared = setup(ctx)
+                    if prepared is None:
+                        continue
+                    best, median = measure(*prepared, args.repeat)
+                finally:
+                    os.chdir(cwd)
+                per_call = kind == 'calls'
+                results.append({'name': name, 'size': size, 'nan_ratio': ratio, 'repeat': args.repeat,
+                                'best': best, 'median': median, 'per_call': per_call})
+                print(f"{name:>32} {size or '':>9} {'' if ratio is None else ratio:>5} "
+                      f"{best:>12.3e} {median:>12.3e}" + ('  на вызов' if per_call else ''))
+
+    commit, dirty = git_commit()
+    report = {
+        'meta': {
+            'commit': commit,
+            'dirty': dirty,
+            'date': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'args': {k: v for k, v in vars(args).items() if k not in ('output', 'compare')},
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"Результаты сохранены в {args.output}")
+    if args.compare and compare(results, args.compare, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
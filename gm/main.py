@@ -1,6 +1,8 @@
 import os
 import json
-import matplotlib.pyplot as plt
+import argparse
+from itertools import islice
+import numpy as np
 
 def read_data(filename):
     x = []
@@ -16,6 +18,37 @@ def read_data(filename):
                 y.append(float('nan'))
     return x, y
 
+def _parse_y(values):
+    try:
+        return np.array(values, dtype=float)
+    except ValueError:
+        y = np.empty(len(values))
+        for i, value in enumerate(values):
+            try:
+                y[i] = float(value)
+            except ValueError:
+                y[i] = np.nan
+        return y
+
+def read_data_chunks(filename, chunk_size=100_000):
+    """Чтение файла x;y блоками по chunk_size строк в массивы numpy"""
+    with open(filename, 'r') as f:
+        next(f)  # Пропускаем заголовок
+        while True:
+            lines = list(islice(f, chunk_size))
+            if not lines:
+                return
+            lines = [line for line in lines if line.strip()]
+            if not lines:
+                continue
+            try:
+                block = np.loadtxt(lines, delimiter=';', dtype=[('x', np.int64), ('y', float)], ndmin=1)
+                yield block['x'], block['y']
+            except ValueError:
+                # Нечисловые y (пустые и т.п.) считаем пропусками, как read_data
+                parts = [line.strip().split(';') for line in lines]
+                yield np.array([part[0] for part in parts], dtype=np.int64), _parse_y([part[1] for part in parts])
+
 def find_nearest_valid_indices(data, index):
     left = index - 1
     while left >= 0 and data[left] != data[left]:
@@ -132,58 +165,872 @@ def quadratic_interpolation(x, y, verbose=False):
 
     return y_interp, interpolation_info
 
+def linear_interpolation_np(x, y, verbose=False, details=True):
+    """Векторизованная линейная интерполяция: все пропуски за один проход.
+
+    Соседние известные точки ищутся через searchsorted по индексам
+    известных точек, поэтому время работы O(n log k) вместо квадратичного
+    на длинных сериях NaN. Значения совпадают с linear_interpolation
+    с точностью до округления (та же прямая, но без цепочки через уже
+    заполненные точки), interpolation_info имеет тот же вид.
+    details='columns' возвращает подробности параллельными массивами
+    (см. info_columns) без словаря на каждую точку.
+    """
+    x = np.asarray(x)
+    y = np.asarray(y, dtype=float)
+    y_interp = y.copy()
+    interpolation_info = {}
+
+    valid_indices = np.flatnonzero(~np.isnan(y))
+    gaps = np.flatnonzero(np.isnan(y))
+    if valid_indices.size == 0 or gaps.size == 0:
+        return y_interp, interpolation_info
+
+    pos = np.searchsorted(valid_indices, gaps)
+    inner = (pos > 0) & (pos < valid_indices.size)
+    gaps, pos = gaps[inner], pos[inner]
+    left = valid_indices[pos - 1]
+    right = valid_indices[pos]
+
+    y_interp[gaps] = y[left] + (y[right] - y[left]) * (x[gaps] - x[left]) / (x[right] - x[left])
+
+    if details == 'columns':
+        prev = gaps - 1
+        interpolation_info = {
+            'index': gaps,
+            'x': x[gaps],
+            'used_x': np.column_stack((x[prev], x[right])),
+            'used_y': np.column_stack((y[prev], y[right])),
+            'interpolated_value': y_interp[gaps],
+        }
+        details = False
+
+    if details or verbose:
+        # Исходная функция берёт левой точкой предыдущую (уже заполненную),
+        # поэтому в used_points слева стоит (x[i-1], y[i-1]) из исходных данных
+        prev = gaps - 1
+        rows = zip(gaps.tolist(), x[gaps].tolist(), x[prev].tolist(), y[prev].tolist(),
+                   x[right].tolist(), y[right].tolist(), y_interp[gaps].tolist())
+        for i, xi, x_left, y_left, x_right, y_right, value in rows:
+            if details:
+                interpolation_info[i] = {
+                    'x': xi,
+                    'used_points': [(x_left, y_left), (x_right, y_right)],
+                    'interpolated_value': value,
+                    'method': 'linear'
+                }
+            if verbose:
+                print(f"Точка x={xi}: использованы точки (x={x_left}, y={y_left}) и (x={x_right}, y={y_right})")
+                print(f"Результат интерполяции: {value:.2f}\n")
+
+    return y_interp, interpolation_info
+
+def _quadratic_coefficients(x0, x1, x2, y0, y1, y2):
+    """Коэффициенты парабол через тройки точек по правилу Крамера.
+
+    Возвращает маску разрешимых систем (det != 0) и a, b, c только для них.
+    """
+    x0_sq, x1_sq, x2_sq = x0**2, x1**2, x2**2
+    if np.issubdtype(x0.dtype, np.integer):
+        # Те же целые выражения в разложенном виде: точны и не переполняют int64
+        q = (x2 - x1) * (x2 + x1)
+        p = x1 * x2 * (x1 - x2)
+        det = (x1 - x2) * (x0 - x1) * (x0 - x2)
+    else:
+        q = x2_sq - x1_sq
+        p = x1_sq * x2 - x2_sq * x1
+        det = (x0_sq * (x1 - x2)) + (x0 * q) + p
+
+    det_a = y0 * (x1 - x2) + y1 * (x2 - x0) + y2 * (x0 - x1)
+    det_b = x0_sq * (y1 - y2) + y0 * q + x1_sq * y2 - x2_sq * y1
+    det_c = x0_sq * (x1 * y2 - x2 * y1) + x0 * (x2_sq * y1 - x1_sq * y2) + y0 * p
+
+    solvable = det != 0
+    return solvable, det_a[solvable] / det[solvable], det_b[solvable] / det[solvable], det_c[solvable] / det[solvable]
+
+def quadratic_interpolation_np(x, y, verbose=False, details=True):
+    """Векторизованная квадратичная интерполяция: все пропуски за один проход.
+
+    Тройки точек выбираются по тем же правилам, что и в
+    quadratic_interpolation (две ближайшие слева и справа, добор с одной
+    стороны у краёв), но через searchsorted по x известных точек, а
+    коэффициенты считаются по правилу Крамера сразу для всех пропусков.
+    Для целых x результат совпадает бит в бит, для дробных — с точностью
+    до округления. Требует строго возрастающих x, иначе вызывает исходную
+    функцию. details='columns' — как в linear_interpolation_np.
+    """
+    x = np.asarray(x)
+    y = np.asarray(y, dtype=float)
+    if x.size > 1 and not np.all(np.diff(x) > 0):
+        y_ref, interpolation_info = quadratic_interpolation(x.tolist(), y.tolist(), verbose)
+        if details == 'columns':
+            interpolation_info = info_columns(interpolation_info)
+        return np.asarray(y_ref, dtype=float), interpolation_info
+
+    y_interp = y.copy()
+    interpolation_info = {}
+
+    valid_indices = np.flatnonzero(~np.isnan(y))
+    gaps = np.flatnonzero(np.isnan(y))
+    k = valid_indices.size
+    if k < 3 or gaps.size == 0:
+        return y_interp, interpolation_info
+
+    # pos — число известных точек левее пропуска
+    pos = np.searchsorted(x[valid_indices], x[gaps])
+    n_left = np.minimum(pos, 2)
+    n_right = np.minimum(k - pos, 2)
+
+    both = (n_left == 2) & (n_right >= 1)
+    only_left = (n_left == 2) & (n_right == 0) & (pos >= 3)
+    one_left = (n_left == 1) & (n_right == 2)
+    only_right = (n_left == 0) & (k - pos >= 3)
+    ok = both | only_left | one_left | only_right
+
+    gaps, pos = gaps[ok], pos[ok]
+    both, only_left, one_left = both[ok], only_left[ok], one_left[ok]
+
+    # Порядок точек как в исходной функции: сначала ближайшие слева, затем справа
+    p0 = np.where(both | only_left | one_left, pos - 1, pos)
+    p1 = np.where(both | only_left, pos - 2, pos + np.where(one_left, 0, 1))
+    p2 = np.where(both, pos, np.where(only_left, pos - 3, pos + np.where(one_left, 1, 2)))
+    j0, j1, j2 = valid_indices[p0], valid_indices[p1], valid_indices[p2]
+
+    x0, x1, x2 = x[j0], x[j1], x[j2]
+    y0, y1, y2 = y[j0], y[j1], y[j2]
+
+    solvable, a, b, c = _quadratic_coefficients(x0, x1, x2, y0, y1, y2)
+    gaps = gaps[solvable]
+    x0, x1, x2, y0, y1, y2 = (v[solvable] for v in (x0, x1, x2, y0, y1, y2))
+
+    xi = x[gaps]
+    y_interp[gaps] = a * xi**2 + b * xi + c
+
+    if details == 'columns':
+        interpolation_info = {
+            'index': gaps,
+            'x': xi,
+            'used_x': np.column_stack((x0, x1, x2)),
+            'used_y': np.column_stack((y0, y1, y2)),
+            'interpolated_value': y_interp[gaps],
+            'coefficients': np.column_stack((a, b, c)),
+        }
+        details = False
+
+    if details or verbose:
+        rows = zip(gaps.tolist(), xi.tolist(), y_interp[gaps].tolist(), a.tolist(), b.tolist(), c.tolist(),
+                   x0.tolist(), y0.tolist(), x1.tolist(), y1.tolist(), x2.tolist(), y2.tolist())
+        for i, x_i, value, a_i, b_i, c_i, *coords in rows:
+            points = list(zip(coords[::2], coords[1::2]))
+            if details:
+                interpolation_info[i] = {
+                    'x': x_i,
+                    'used_points': points,
+                    'interpolated_value': value,
+                    'method': 'quadratic',
+                    'coefficients': {'a': a_i, 'b': b_i, 'c': c_i}
+                }
+            if verbose:
+                print(f"Точка x={x_i}: использованы точки:")
+                for pt in points:
+                    print(f"  (x={pt[0]}, y={pt[1]:.2f})")
+                print(f"Коэффициенты: a={a_i:.4f}, b={b_i:.4f}, c={c_i:.4f}")
+                print(f"Результат интерполяции: {value:.2f}\n")
+
+    return y_interp, interpolation_info
+
+def _solve_tridiagonal(lower, diag, upper, rhs):
+    """Метод прогонки: O(n) для трёхдиагональной системы"""
+    n = len(diag)
+    c = [0.0] * n
+    d = [0.0] * n
+    c[0] = upper[0] / diag[0]
+    d[0] = rhs[0] / diag[0]
+    for i in range(1, n):
+        m = diag[i] - lower[i] * c[i - 1]
+        c[i] = upper[i] / m
+        d[i] = (rhs[i] - lower[i] * d[i - 1]) / m
+    for i in range(n - 2, -1, -1):
+        d[i] -= c[i] * d[i + 1]
+    return d
+
+def _cubic_spline_segments(xv, yv):
+    """Коэффициенты естественного кубического сплайна на каждом отрезке.
+
+    На отрезке j значение равно a*t**3 + b*t**2 + c*t + d, где t = x - xv[j].
+    Вторые производные во внутренних узлах — решение одной
+    трёхдиагональной системы, на концах они равны нулю.
+    """
+    h = np.diff(xv)
+    slope = np.diff(yv) / h
+    second = np.zeros(xv.size)
+    if xv.size > 2:
+        second[1:-1] = _solve_tridiagonal(
+            np.concatenate(([0.0], h[1:-1])).tolist(),
+            (2 * (h[:-1] + h[1:])).tolist(),
+            np.concatenate((h[1:-1], [0.0])).tolist(),
+            (6 * np.diff(slope)).tolist(),
+        )
+    a = (second[1:] - second[:-1]) / (6 * h)
+    b = second[:-1] / 2
+    c = slope - h * (2 * second[:-1] + second[1:]) / 6
+    points = np.column_stack((np.arange(xv.size - 1), np.arange(1, xv.size)))
+    return np.column_stack((a, b, c, yv[:-1])), points
+
+def _piecewise_quadratic_segments(xv, yv):
+    """Парабола на каждом отрезке через его концы и следующий узел.
+
+    На последнем отрезке третьим берётся предыдущий узел. Значение равно
+    a*t**2 + b*t + c, где t = x - xv[j].
+    """
+    j = np.arange(xv.size - 1)
+    third = np.where(j + 2 < xv.size, j + 2, j - 1)
+    t1 = xv[j + 1] - xv[j]
+    t2 = xv[third] - xv[j]
+    s1 = (yv[j + 1] - yv[j]) / t1
+    s2 = (yv[third] - yv[j]) / t2
+    a = (s2 - s1) / (t2 - t1)
+    b = s1 - a * t1
+    return np.column_stack((a, b, yv[:-1])), np.column_stack((j, j + 1, third))
+
+# Метод -> (построение отрезков, минимум известных точек)
+_SEGMENT_BUILDERS = {
+    'cubic_spline': (_cubic_spline_segments, 2),
+    'piecewise_quadratic': (_piecewise_quadratic_segments, 3),
+}
+
+def _segment_interpolation(method, x, y, verbose, details):
+    build, min_points = _SEGMENT_BUILDERS[method]
+    x = np.asarray(x)
+    y = np.asarray(y, dtype=float)
+    y_interp = y.copy()
+    interpolation_info = {}
+
+    valid_indices = np.flatnonzero(~np.isnan(y))
+    gaps = np.flatnonzero(np.isnan(y))
+    if valid_indices.size < min_points or gaps.size == 0:
+        return y_interp, interpolation_info
+
+    xv = x[valid_indices].astype(float)
+    yv = y[valid_indices]
+    coefficients, points = build(xv, yv)
+
+    # Отрезок пропуска — номер ближайшей известной точки слева
+    segment = np.searchsorted(xv, x[gaps]) - 1
+    inner = (segment >= 0) & (segment < xv.size - 1)
+    gaps, segment = gaps[inner], segment[inner]
+
+    t = x[gaps] - xv[segment]
+    coefs = coefficients[segment]
+    values = coefs[:, 0]
+    for column in range(1, coefs.shape[1]):
+        values = values * t + coefs[:, column]
+    y_interp[gaps] = values
+
+    used = valid_indices[points[segment]]
+    if details == 'columns':
+        interpolation_info = {
+            'index': gaps,
+            'x': x[gaps],
+            'segment': segment,
+            'used_x': x[used],
+            'used_y': y[used],
+            'interpolated_value': values,
+            'coefficients': coefs,
+        }
+        details = False
+
+    if details or verbose:
+        rows = zip(gaps.tolist(), x[gaps].tolist(), segment.tolist(), x[used].tolist(),
+                   y[used].tolist(), values.tolist(), coefs.tolist())
+        for i, x_i, seg, used_x, used_y, value, coef in rows:
+            if details:
+                interpolation_info[i] = {
+                    'x': x_i,
+                    'segment': seg,
+                    'used_points': list(zip(used_x, used_y)),
+                    'interpolated_value': value,
+                    'method': method,
+                    'coefficients': dict(zip('abcd', coef))
+                }
+            if verbose:
+                print(f"Точка x={x_i}: отрезок {seg} [x={used_x[0]}, x={used_x[1]}]")
+                print(f"Результат интерполяции: {value:.2f}\n")
+
+    return y_interp, interpolation_info
+
+def cubic_spline_interpolation(x, y, verbose=False, details=True):
+    """Естественный кубический сплайн по всем известным точкам.
+
+    Сплайн строится один раз (прогонка за O(n)), затем все пропуски
+    вычисляются одним searchsorted и схемой Горнера. В interpolation_info
+    записывается номер отрезка (segment) и его концы; коэффициенты
+    относятся к t = x - x_left. Пропуски до первой и после последней
+    известной точки не заполняются. Требует возрастающих x.
+    """
+    return _segment_interpolation('cubic_spline', x, y, verbose, details)
+
+def piecewise_quadratic_interpolation(x, y, verbose=False, details=True):
+    """Кусочно-квадратичная интерполяция с параболой на отрезок.
+
+    В отличие от quadratic_interpolation, парабола считается один раз на
+    отрезок между соседними известными точками и общая для всех его
+    пропусков. Остальное — как в cubic_spline_interpolation.
+    """
+    return _segment_interpolation('piecewise_quadratic', x, y, verbose, details)
+
+# Методы по всему ряду сразу; потоковый режим (interpolate_stream) их не поддерживает
+SEGMENT_INTERPOLATORS = {
+    'cubic_spline': cubic_spline_interpolation,
+    'piecewise_quadratic': piecewise_quadratic_interpolation,
+}
+
+def _read_csv_table(filename):
+    with open(filename, 'r') as f:
+        header = f.readline().strip().split(';')
+    try:
+        data = np.loadtxt(filename, delimiter=';', skiprows=1, ndmin=2)
+    except ValueError:
+        # Пустые и нечисловые ячейки считаем пропусками, как read_data
+        data = np.genfromtxt(filename, delimiter=';', skip_header=1, ndmin=2)
+    return data[:, 0], header[1:], data[:, 1:]
+
+def _read_sheet(filename, sheet=None):
+    # openpyxl нужен только для таблиц Excel: pip install python-analytic[excel]
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(filename, read_only=True, data_only=True)
+    try:
+        if sheet is None:
+            worksheet = workbook.worksheets[0]
+        elif isinstance(sheet, int) or str(sheet).isdigit():
+            worksheet = workbook.worksheets[int(sheet)]
+        else:
+            worksheet = workbook[sheet]
+        rows = list(worksheet.iter_rows(values_only=True))
+    finally:
+        workbook.close()
+
+    # Строки данных — с числом в первой ячейке; заголовок — последняя
+    # непустая строка перед ними (выше обычно название листа)
+    is_data = [bool(row) and isinstance(row[0], (int, float)) for row in rows]
+    first = is_data.index(True)
+    header = next(row for row in reversed(rows[:first]) if any(v is not None for v in row[1:]))
+    columns = [j for j in range(1, len(header)) if header[j] is not None]
+    body = [row for row, data in zip(rows, is_data) if data]
+    x = np.array([row[0] for row in body], dtype=float)
+    values = np.array([[row[j] if j < len(row) and isinstance(row[j], (int, float)) else np.nan
+                        for j in columns] for row in body], dtype=float)
+    return x, [str(header[j]) for j in columns], values
+
+def read_table(filename, sheet=None):
+    """Чтение широкой таблицы: общий x и столбцы рядов.
+
+    CSV — с разделителем ';' и заголовком x;имя1;имя2..., лист Excel
+    (.xlsx) — как в data/dop.xlsx: первый столбец x, над данными строка
+    с именами столбцов. Возвращает (x, имена, значения формы (n, m)),
+    пропуски — NaN, x — float.
+    """
+    suffix = os.path.splitext(str(filename))[1].lower()
+    if suffix in ('.xlsx', '.xlsm'):
+        return _read_sheet(filename, sheet)
+    if suffix == '.xls':
+        raise ValueError("формат .xls не поддерживается, сохраните лист как .xlsx")
+    return _read_csv_table(filename)
+
+def _column_positions(values):
+    """Пропуски таблицы и их место среди известных точек своего столбца.
+
+    Столбцы просматриваются подряд (как одна длинная строка), поэтому
+    соседи всех пропусков находятся одним searchsorted. Возвращает
+    (строки известных точек подряд по столбцам, начало каждого столбца
+    в них, строки и столбцы пропусков, pos — число известных точек
+    столбца выше пропуска, k — число известных точек в столбце).
+    """
+    n, m = values.shape
+    missing = np.isnan(values).T
+    valid_flat = np.flatnonzero(~missing)
+    gaps_flat = np.flatnonzero(missing)
+    starts = np.searchsorted(valid_flat, np.arange(m + 1) * n)
+    rows, cols = gaps_flat % n, gaps_flat // n
+    pos = np.searchsorted(valid_flat, gaps_flat) - starts[cols]
+    k = np.diff(starts)[cols]
+    return valid_flat % n, starts, rows, cols, pos, k
+
+def _check_table(x, values):
+    x = np.asarray(x)
+    values = np.asarray(values, dtype=float)
+    if values.ndim != 2 or values.shape[0] != x.size:
+        raise ValueError("значения должны иметь форму (len(x), число столбцов)")
+    if x.size > 1 and not np.all(np.diff(x) > 0):
+        raise ValueError("x должны строго возрастать")
+    return x, values
+
+def linear_interpolation_2d(x, values):
+    """Линейная интерполяция всех столбцов сразу.
+
+    Значения совпадают с linear_interpolation_np для каждого столбца;
+    подробности по точкам не собираются. Возвращает заполненную копию.
+    """
+    x, values = _check_table(x, values)
+    filled = values.copy()
+    valid_rows, starts, rows, cols, pos, k = _column_positions(values)
+    inner = (pos > 0) & (pos < k)
+    rows, cols, base = rows[inner], cols[inner], starts[cols[inner]] + pos[inner]
+    left, right = valid_rows[base - 1], valid_rows[base]
+
+    y_left, y_right = values[left, cols], values[right, cols]
+    filled[rows, cols] = y_left + (y_right - y_left) * (x[rows] - x[left]) / (x[right] - x[left])
+    return filled
+
+def quadratic_interpolation_2d(x, values):
+    """Квадратичная интерполяция всех столбцов сразу.
+
+    Тройки точек выбираются по тем же правилам, что и в
+    quadratic_interpolation_np, с pos и k своего столбца для каждого
+    пропуска, значения совпадают с ней. Возвращает заполненную копию.
+    """
+    x, values = _check_table(x, values)
+    filled = values.copy()
+    valid_rows, starts, rows, cols, pos, k = _column_positions(values)
+    n_left = np.minimum(pos, 2)
+    n_right = np.minimum(k - pos, 2)
+
+    both = (n_left == 2) & (n_right >= 1)
+    only_left = (n_left == 2) & (n_right == 0) & (pos >= 3)
+    one_left = (n_left == 1) & (n_right == 2)
+    only_right = (n_left == 0) & (k - pos >= 3)
+    ok = both | only_left | one_left | only_right
+
+    rows, cols, pos = rows[ok], cols[ok], pos[ok]
+    both, only_left, one_left = both[ok], only_left[ok], one_left[ok]
+
+    p0 = np.where(both | only_left | one_left, pos - 1, pos)
+    p1 = np.where(both | only_left, pos - 2, pos + np.where(one_left, 0, 1))
+    p2 = np.where(both, pos, np.where(only_left, pos - 3, pos + np.where(one_left, 1, 2)))
+    base = starts[cols]
+    j0, j1, j2 = valid_rows[base + p0], valid_rows[base + p1], valid_rows[base + p2]
+
+    solvable, a, b, c = _quadratic_coefficients(x[j0], x[j1], x[j2],
+                                                values[j0, cols], values[j1, cols], values[j2, cols])
+    rows, cols = rows[solvable], cols[solvable]
+    xi = x[rows]
+    filled[rows, cols] = a * xi**2 + b * xi + c
+    return filled
+
+TABLE_INTERPOLATORS = {
+    'linear': linear_interpolation_2d,
+    'quadratic': quadratic_interpolation_2d,
+}
+
+def _fill_group(method, x, values):
+    return TABLE_INTERPOLATORS[method](x, values)
+
+def fill_table(x, values, method='linear', axis=0, workers=None):
+    """Заполнение пропусков в таблице рядов с общим x.
+
+    axis=0 — ряды в столбцах (x по строкам), axis=1 — ряды в строках
+    (x — заголовки столбцов), например сетка «день × час» по часам.
+    При workers > 1 группы столбцов считаются в отдельных процессах.
+    """
+    values = np.asarray(values, dtype=float)
+    if axis == 1:
+        return fill_table(x, values.T, method, 0, workers).T
+    if not workers or workers <= 1 or values.shape[1] < 2:
+        return _fill_group(method, x, values)
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    groups = np.array_split(np.arange(values.shape[1]), min(workers, values.shape[1]))
+    filled = np.empty_like(values)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [(columns, pool.submit(_fill_group, method, x, values[:, columns])) for columns in groups]
+        for columns, future in futures:
+            filled[:, columns] = future.result()
+    return filled
+
+def table_main(data_file, output_dir, sheet=None, method='linear', axis=0, workers=None):
+    """Заполнение пропусков во всех столбцах таблицы и запись в CSV"""
+    x, names, values = read_table(data_file, sheet)
+    series_x = np.array(names, dtype=float) if axis == 1 else x
+    filled = fill_table(series_x, values, method, axis, workers)
+
+    output_file = os.path.join(output_dir, f'interpolation_table_{method}.csv')
+    with open(output_file, 'w') as f:
+        f.write(';'.join(['x', *names]) + '\n')
+        for row in np.column_stack((x, filled)).tolist():
+            f.write(';'.join(map(str, row)) + '\n')
+    print(f"{method}: заполнено {int(np.isnan(values).sum() - np.isnan(filled).sum())} "
+          f"из {int(np.isnan(values).sum())} пропусков, таблица {values.shape[0]}×{values.shape[1]} "
+          f"сохранена в {output_file}")
+
+def info_columns(interpolation_info):
+    """interpolation_info в виде параллельных массивов (index, x, used_x, ...)"""
+    items = sorted(interpolation_info.items())
+    columns = {
+        'index': np.array([i for i, _ in items], dtype=np.int64),
+        'x': np.array([info['x'] for _, info in items]),
+        'used_x': np.array([[pt[0] for pt in info['used_points']] for _, info in items]),
+        'used_y': np.array([[pt[1] for pt in info['used_points']] for _, info in items], dtype=float),
+        'interpolated_value': np.array([info['interpolated_value'] for _, info in items], dtype=float),
+    }
+    if items and 'segment' in items[0][1]:
+        columns['segment'] = np.array([info['segment'] for _, info in items], dtype=np.int64)
+    if items and 'coefficients' in items[0][1]:
+        columns['coefficients'] = np.array([list(info['coefficients'].values()) for _, info in items])
+    return columns
+
+INTERPOLATORS = {
+    'linear': linear_interpolation_np,
+    'quadratic': quadratic_interpolation_np,
+}
+
+# Значение пропуска зависит максимум от трёх известных точек с каждой стороны
+_CONTEXT_POINTS = 3
+
+def interpolate_stream(chunks, method='linear', details=True):
+    """Интерполяция потока блоков (x, y) с переносом контекста между блоками.
+
+    Хвост каждого блока, для которого справа ещё мало известных точек,
+    откладывается до следующего блока вместе с тремя известными точками
+    слева, поэтому результат совпадает с интерполяцией всего ряда сразу.
+    Выдаёт (x, y_interp, interpolation_info) с глобальными индексами в
+    interpolation_info. Предполагает возрастающие x.
+    """
+    interpolate = INTERPOLATORS[method]
+    carry_x = np.empty(0, dtype=np.int64)
+    carry_y = np.empty(0)
+    offset = 0   # глобальный индекс первой точки carry
+    n_done = 0   # сколько точек carry уже выдано
+
+    for x, y in chunks:
+        buf_x = np.concatenate((carry_x, x))
+        buf_y = np.concatenate((carry_y, y))
+        valid = np.flatnonzero(~np.isnan(buf_y))
+        if valid.size < _CONTEXT_POINTS:
+            carry_x, carry_y = buf_x, buf_y
+            continue
+
+        # Точки до третьей с конца известной включительно уже не изменятся
+        end = int(valid[-_CONTEXT_POINTS]) + 1
+        if end > n_done:
+            y_interp, info = interpolate(buf_x, buf_y, details=details)
+            yield buf_x[n_done:end], y_interp[n_done:end], _shift_info(info, n_done, end, offset)
+
+        # Оставляем три известные точки слева от ещё не выданной части
+        kept = valid[valid < end]
+        start = int(kept[-_CONTEXT_POINTS]) if kept.size >= _CONTEXT_POINTS else 0
+        carry_x, carry_y = buf_x[start:], buf_y[start:]
+        offset += start
+        n_done = end - start
+
+    if carry_x.size > n_done:
+        y_interp, info = interpolate(carry_x, carry_y, details=details)
+        yield carry_x[n_done:], y_interp[n_done:], _shift_info(info, n_done, carry_x.size, offset)
+
+def _shift_info(info, begin, end, offset):
+    return {offset + i: details for i, details in info.items() if begin <= i < end}
+
+def _write_xy(out, x, y):
+    values = [None] * (2 * x.size)
+    values[::2] = x.tolist()
+    values[1::2] = y.tolist()
+    out.write(('%d;%.17g\n' * x.size) % tuple(values))
+
+def interpolate_file_stream(data_file, output_file, method='linear', chunk_size=100_000, details_file=None):
+    """Потоковая интерполяция файла x;y с записью результата по мере готовности.
+
+    Заполненный ряд пишется в output_file в том же формате x;y, подробности
+    по каждой интерполированной точке — построчно в JSON (details_file).
+    Память зависит от chunk_size, а не от длины файла.
+    """
+    written = 0
+    details_out = open(details_file, 'w') if details_file else None
+    try:
+        with open(output_file, 'w') as out:
+            out.write('x;y\n')
+            for x, y, info in interpolate_stream(read_data_chunks(data_file, chunk_size), method, details_out is not None):
+                _write_xy(out, x, y)
+                written += x.size
+                if details_out:
+                    for i, point in info.items():
+                        details_out.write(json.dumps({'index': i, **point}) + '\n')
+    finally:
+        if details_out:
+            details_out.close()
+    return written
+
+# Копия живёт в lab2/main.py (скрипт запускается без импорта из gm) — менять вместе
+def _bucket_extremes(bucket, values, positions):
+    """Индексы минимума и максимума values[positions] в каждой корзине"""
+    if positions.size == 0:
+        return positions
+    order = positions[np.lexsort((values[positions], bucket[positions]))]
+    sorted_buckets = bucket[order]
+    starts = np.flatnonzero(np.r_[True, sorted_buckets[1:] != sorted_buckets[:-1]])
+    ends = np.r_[starts[1:], order.size] - 1
+    return np.concatenate((order[starts], order[ends]))
+
+def decimate(x, y, max_points, keep=None):
+    """Прореживание ряда перед построением графика: min/max по корзинам x.
+
+    Диапазон x делится на max_points // 2 корзин, в каждой остаются
+    минимум и максимум y — форма кривой и выбросы сохраняются. Кроме
+    того, в каждой корзине остаётся первая точка каждого вида: NaN
+    (чтобы разрывы на графике не исчезали) и точка из маски keep,
+    например интерполированные значения, с их min/max. Возвращает
+    отсортированные индексы; при len(y) <= max_points — все индексы.
+    """
+    x = np.asarray(x)
+    y = np.asarray(y, dtype=float)
+    n = y.size
+    if max_points is None or n <= max_points:
+        return np.arange(n)
+
+    n_buckets = max(1, max_points // 2)
+    span = float(x[-1] - x[0]) or 1.0
+    bucket = np.minimum(((x - x[0]) / span * n_buckets).astype(np.int64), n_buckets - 1)
+
+    nan = np.isnan(y)
+    picks = [np.array([0, n - 1]), _bucket_extremes(bucket, y, np.flatnonzero(~nan))]
+
+    # Начало каждой серии NaN — по одной на корзину, чтобы число точек было ограничено
+    gap_starts = np.flatnonzero(nan & ~np.r_[False, nan[:-1]])
+    picks.append(gap_starts[np.unique(bucket[gap_starts], return_index=True)[1]])
+    # И точка перед концом серии, чтобы линия не тянулась через разрыв
+    gap_ends = np.flatnonzero(nan & ~np.r_[nan[1:], False])
+    picks.append(gap_ends[np.unique(bucket[gap_ends], return_index=True)[1]])
+
+    if keep is not None:
+        keep = np.asarray(keep, dtype=bool)
+        picks.append(_bucket_extremes(bucket, y, np.flatnonzero(keep & ~nan)))
+
+    return np.unique(np.concatenate(picks))
+
+# Подписи и стиль линий для SEGMENT_INTERPOLATORS на графике
+_EXTRA_STYLES = {
+    'cubic_spline': ('m:', 'Кубический сплайн'),
+    'piecewise_quadratic': ('c-', 'Кусочно-квадратичная интерполяция'),
+}
+
+def plot_interpolation(x, y, y_linear, y_quad, output_img, max_points=None, extra=None):
+    """График исходных данных и интерполяций.
+
+    max_points включает прореживание (decimate): для каждого ряда остаётся
+    порядка max_points точек, заполненные пропуски сохраняются. extra —
+    {метод: значения} для SEGMENT_INTERPOLATORS.
+    """
+    # pyplot нужен только здесь: decimate и интерполяцию можно импортировать без него
+    import matplotlib.pyplot as plt
+
+    x = np.asarray(x)
+    y = np.asarray(y, dtype=float)
+    filled = np.isnan(y)
+    shown = decimate(x, y, max_points)
+    shown_linear = decimate(x, y_linear, max_points, keep=filled)
+    shown_quad = decimate(x, y_quad, max_points, keep=filled)
+
+    plt.figure(figsize=(12, 6))
+    plt.scatter(x[shown], y[shown], color='red', label='Исходные данные', zorder=3)
+    plt.plot(x[shown_linear], np.asarray(y_linear)[shown_linear], 'b--', label='Линейная интерполяция', alpha=0.7)
+    plt.plot(x[shown_quad], np.asarray(y_quad)[shown_quad], 'g-.', label='Квадратичная интерполяция', alpha=0.7)
+    for method, values in (extra or {}).items():
+        style, label = _EXTRA_STYLES[method]
+        shown_extra = decimate(x, values, max_points, keep=filled)
+        plt.plot(x[shown_extra], np.asarray(values)[shown_extra], style, label=label, alpha=0.7)
+    plt.xlabel('x')
+    plt.ylabel('y')
+    plt.title('Интерполяция таблично заданной функции')
+    plt.legend()
+    plt.grid(True)
+
+    plt.savefig(output_img, dpi=300, bbox_inches='tight')
+    plt.close()
+
 def save_results(filename, data):
     """Сохранение результатов в JSON файл"""
     with open(filename, 'w') as f:
         json.dump(data, f, indent=4)
 
-def main():
+def save_results_npz(filename, x, y, results):
+    """Сохранение результатов в .npz: по массиву на столбец.
+
+    results — {метод: (значения, подробности в виде столбцов)}. Значения
+    хранятся один раз на метод, подробности — параллельными массивами
+    с префиксом метода (linear_index, linear_used_x, ...).
+    """
+    arrays = {'x': np.asarray(x), 'y': np.asarray(y, dtype=float), 'methods': np.array(list(results))}
+    for method, (values, columns) in results.items():
+        arrays[f'{method}_values'] = np.asarray(values, dtype=float)
+        for name, column in columns.items():
+            arrays[f'{method}_{name}'] = column
+    np.savez(filename, **arrays)
+
+class InterpolationResults:
+    """Ленивое чтение результатов из .npz.
+
+    Каждый массив читается с диска при первом обращении и дальше берётся
+    из памяти (NpzFile сам не кэширует), поэтому для одного пропуска не
+    нужно разбирать весь файл, а обход всех пропусков читает его один раз.
+    """
+
+    def __init__(self, filename):
+        self._npz = np.load(filename)
+        self._arrays = {}
+        self.methods = self._npz['methods'].tolist()
+
+    def _array(self, key):
+        if key not in self._arrays:
+            self._arrays[key] = self._npz[key]
+        return self._arrays[key]
+
+    @property
+    def x(self):
+        return self._array('x')
+
+    @property
+    def y(self):
+        return self._array('y')
+
+    def values(self, method):
+        return self._array(f'{method}_values')
+
+    def details(self, method):
+        """Подробности метода: {столбец: массив}"""
+        prefix = f'{method}_'
+        return {key[len(prefix):]: self._array(key) for key in self._npz.files
+                if key.startswith(prefix) and key != f'{method}_values'}
+
+    def info(self, method, index):
+        """Запись interpolation_info для пропуска index в прежнем виде"""
+        indices = self._array(f'{method}_index')
+        row = np.searchsorted(indices, index)
+        if row == indices.size or indices[row] != index:
+            raise KeyError(index)
+        used_x = self._array(f'{method}_used_x')[row].tolist()
+        used_y = self._array(f'{method}_used_y')[row].tolist()
+        info = {
+            'x': self._array(f'{method}_x')[row].item(),
+            **({'segment': self._array(f'{method}_segment')[row].item()}
+               if f'{method}_segment' in self._npz.files else {}),
+            'used_points': list(zip(used_x, used_y)),
+            'interpolated_value': self._array(f'{method}_interpolated_value')[row].item(),
+            'method': method,
+        }
+        if f'{method}_coefficients' in self._npz.files:
+            info['coefficients'] = dict(zip('abcd', self._array(f'{method}_coefficients')[row].tolist()))
+        return info
+
+    def close(self):
+        self._arrays.clear()
+        self._npz.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def load_results(filename):
+    """Открыть результаты: .npz лениво, прежний JSON — целиком"""
+    if str(filename).endswith('.json'):
+        with open(filename) as f:
+            return json.load(f)
+    return InterpolationResults(filename)
+
+def stream_main(data_file, output_dir, chunk_size):
+    for method in INTERPOLATORS:
+        output_file = os.path.join(output_dir, f'interpolation_{method}.csv')
+        details_file = os.path.join(output_dir, f'interpolation_{method}_details.jsonl')
+        written = interpolate_file_stream(data_file, output_file, method, chunk_size, details_file)
+        print(f"{method}: {written} точек записано в {output_file}, подробности в {details_file}")
+
+def main(argv=None):
     script_dir = os.path.dirname(os.path.abspath(__file__))
-    data_file = os.path.join(script_dir, 'main.csv')
-    
+
+    parser = argparse.ArgumentParser(description='Интерполяция таблично заданной функции')
+    parser.add_argument('data_file', nargs='?', default=os.path.join(script_dir, 'main.csv'))
+    parser.add_argument('-o', '--output-dir', default=script_dir,
+                        help='каталог для результатов и графика (по умолчанию рядом со скриптом)')
+    parser.add_argument('--stream', action='store_true',
+                        help='читать файл блоками и писать результат по мере готовности')
+    parser.add_argument('--chunk-size', type=int, default=100_000)
+    parser.add_argument('--max-points', type=int, default=None,
+                        help='прореживать ряды на графике до примерно стольких точек')
+    parser.add_argument('--format', choices=['npz', 'json'], default='npz',
+                        help='формат результатов: компактный npz или прежний JSON')
+    parser.add_argument('--spline', action='store_true',
+                        help='также кубический сплайн и кусочно-квадратичная интерполяция')
+    parser.add_argument('--table', action='store_true',
+                        help='широкая таблица (CSV или .xlsx): заполнить пропуски во всех столбцах')
+    parser.add_argument('--sheet', default=None, help='лист .xlsx: имя или номер с нуля')
+    parser.add_argument('--method', choices=list(TABLE_INTERPOLATORS), default='linear')
+    parser.add_argument('--axis', type=int, choices=[0, 1], default=0,
+                        help='0 — ряды в столбцах, 1 — ряды в строках (x — заголовки столбцов)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='процессов для групп столбцов в режиме --table')
+    args = parser.parse_args(argv)
+    details = 'columns' if args.format == 'npz' else True
+    data_file = args.data_file
+    output_dir = args.output_dir
+
     try:
+        os.makedirs(output_dir, exist_ok=True)
+        if args.stream:
+            stream_main(data_file, output_dir, args.chunk_size)
+            return
+        if args.table:
+            table_main(data_file, output_dir, args.sheet, args.method, args.axis, args.workers)
+            return
+
         # Чтение данных
         x, y = read_data(data_file)
         
         print("="*50)
         print("Линейная интерполяция:")
         print("="*50)
-        y_linear, linear_info = linear_interpolation(x, y, verbose=True)
+        y_linear, linear_info = linear_interpolation_np(x, y, verbose=True, details=details)
         
         print("\n" + "="*50)
         print("Квадратичная интерполяция:")
         print("="*50)
-        y_quad, quad_info = quadratic_interpolation(x, y, verbose=True)
-        
-        results = {
-            'linear_interpolation': {
-                'values': list(zip(x, y_linear)),
-                'details': linear_info
-            },
-            'quadratic_interpolation': {
-                'values': list(zip(x, y_quad)),
-                'details': quad_info
+        y_quad, quad_info = quadratic_interpolation_np(x, y, verbose=True, details=details)
+
+        extra = {}
+        if args.spline:
+            for method, title in (('cubic_spline', 'Кубический сплайн'),
+                                  ('piecewise_quadratic', 'Кусочно-квадратичная интерполяция')):
+                print("\n" + "="*50)
+                print(f"{title}:")
+                print("="*50)
+                extra[method] = SEGMENT_INTERPOLATORS[method](x, y, verbose=True, details=details)
+
+        if args.format == 'npz':
+            output_file = os.path.join(output_dir, 'interpolation_results.npz')
+            save_results_npz(output_file, x, y, {'linear': (y_linear, linear_info),
+                                                 'quadratic': (y_quad, quad_info), **extra})
+        else:
+            results = {
+                'linear_interpolation': {
+                    'values': list(zip(x, y_linear.tolist())),
+                    'details': linear_info
+                },
+                'quadratic_interpolation': {
+                    'values': list(zip(x, y_quad.tolist())),
+                    'details': quad_info
+                }
             }
-        }
-        
-        output_json = os.path.join(script_dir, 'interpolation_results.json')
-        save_results(output_json, results)
-        print(f"\nРезультаты сохранены в файл: {output_json}")
+            for method, (values, info) in extra.items():
+                results[f'{method}_interpolation'] = {'values': list(zip(x, values.tolist())), 'details': info}
+
+            output_file = os.path.join(output_dir, 'interpolation_results.json')
+            save_results(output_file, results)
+        print(f"\nРезультаты сохранены в файл: {output_file}")
         
         # Построение графиков
-        plt.figure(figsize=(12, 6))
-        plt.scatter(x, y, color='red', label='Исходные данные', zorder=3)
-        plt.plot(x, y_linear, 'b--', label='Линейная интерполяция', alpha=0.7)
-        plt.plot(x, y_quad, 'g-.', label='Квадратичная интерполяция', alpha=0.7)
-        plt.xlabel('x')
-        plt.ylabel('y')
-        plt.title('Интерполяция таблично заданной функции')
-        plt.legend()
-        plt.grid(True)
-        
-        output_img = os.path.join(script_dir, 'interpolation_plot.png')
-        plt.savefig(output_img, dpi=300, bbox_inches='tight')
-        plt.close()
+        output_img = os.path.join(output_dir, 'interpolation_plot.png')
+        plot_interpolation(x, y, y_linear, y_quad, output_img, args.max_points,
+                           {method: values for method, (values, _) in extra.items()})
         print(f"График сохранён в файл: {output_img}")
     
     except FileNotFoundError:
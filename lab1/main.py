@@ -1,15 +1,94 @@
 import os
+import json
+import time
+import hashlib
+import shutil
+import argparse
+from itertools import islice
 from pathlib import Path
+from typing import Iterable, Iterator
 import numpy as np
 
+CACHE_DIR_NAME = '.npcache'
+# Меньше этого (~100 000 значений в тексте) .npy читается целиком: открыть mmap дороже
+MMAP_MIN_SOURCE_BYTES = 2 * 1024 * 1024
+
 def load_data(file_path: str, mode: str = 'np') -> np.ndarray:
     if mode == 'open':
         with open(file_path, 'r') as file:
             raw_values = [float(line.strip()) for line in file if line.strip()]
         return np.array(raw_values)
+    elif mode == 'cache':
+        return load_cached(file_path)
     else:
         return np.loadtxt(file_path)
 
+def load_rows(paths: list[str]) -> np.ndarray:
+    """Ряды одинаковой длины матрицей (len(paths), n): один разбор текста на все файлы.
+
+    Файлы читаются как байты, числа со всех собираются в один список и
+    переводятся в float одним вызовом — без np.loadtxt на каждый файл.
+    """
+    tokens = []
+    lengths = set()
+    for path in paths:
+        with open(path, 'rb') as file:
+            values = file.read().split()
+        lengths.add(len(values))
+        tokens += values
+    if len(lengths) > 1:
+        raise ValueError("Пакетный режим требует рядов одинаковой длины")
+    return np.array(tokens, dtype=float).reshape(len(paths), -1)
+
+def cache_path(file_path: str, info: os.stat_result | None = None) -> Path:
+    """Путь к .npy-копии: ключ — имя источника, его размер и mtime"""
+    source = Path(file_path)
+    info = info or source.stat()
+    return source.parent / CACHE_DIR_NAME / f"{source.name}.{info.st_size}.{info.st_mtime_ns}.npy"
+
+def load_cached(file_path: str, rebuild: bool = False) -> np.ndarray:
+    """Чтение через бинарный кэш: текст разбирается, только если кэш устарел.
+
+    Тёплый кэш — это stat источника и чтение .npy (порядка 70 мкс на
+    файл), что быстрее np.loadtxt на любом размере. Но пакетный режим с
+    --load np разбирает все файлы одним вызовом (load_rows) и на рядах
+    короче ~500 значений обгоняет кэш. Большие файлы (от
+    MMAP_MIN_SOURCE_BYTES) отдаются через mmap без чтения целиком.
+    """
+    info = os.stat(file_path)
+    cached = cache_path(file_path, info)
+    mmap_mode = 'r' if info.st_size >= MMAP_MIN_SOURCE_BYTES else None
+    if not rebuild:
+        try:
+            return np.load(cached, mmap_mode=mmap_mode)
+        except FileNotFoundError:
+            pass
+
+    data = np.loadtxt(file_path)
+    cached.parent.mkdir(exist_ok=True)
+    for stale in cached.parent.glob(f"{Path(file_path).name}.*.npy"):
+        stale.unlink(missing_ok=True)
+    # Пишем во временный файл и переименовываем: параллельные чтения не увидят половину
+    tmp = cached.with_name(f"{cached.name}.{os.getpid()}.tmp")
+    with open(tmp, 'wb') as file:
+        np.save(file, data)
+    os.replace(tmp, cached)
+    return np.load(cached, mmap_mode='r') if mmap_mode else data
+
+def clear_cache(data_dir: Path) -> int:
+    cache_dir = Path(data_dir) / CACHE_DIR_NAME
+    removed = 0
+    for cached in cache_dir.glob("*.npy"):
+        cached.unlink(missing_ok=True)
+        removed += 1
+    return removed
+
+def build_cache(data_dir: Path) -> int:
+    files = ['xc.dat', *list_inputs(data_dir)]
+    for fname in files:
+        load_cached(os.path.join(data_dir, fname), rebuild=True)
+    return len(files)
+
 def compute_stats(data: np.ndarray) -> dict:
     return {
         "average": float(np.mean(data)),
@@ -25,36 +104,478 @@ def calculate_area(x_values: np.ndarray, y_values: np.ndarray) -> float:
     mid_points = (y_values[:-1] + y_values[1:]) / 2
     return float(np.sum(mid_points * step))
 
+def compute_stats_batch(data: np.ndarray) -> dict:
+    return {
+        "average": np.mean(data, axis=1),
+        "highest": np.max(data, axis=1),
+        "lowest": np.min(data, axis=1)
+    }
+
+def get_derivative_batch(x_values: np.ndarray, y_matrix: np.ndarray) -> np.ndarray:
+    return np.gradient(y_matrix, x_values, axis=1)
+
+def calculate_area_batch(x_values: np.ndarray, y_matrix: np.ndarray) -> np.ndarray:
+    step = np.diff(x_values)
+    mid_points = (y_matrix[:, :-1] + y_matrix[:, 1:]) / 2
+    return np.sum(mid_points * step, axis=1)
+
 def write_output(
     output_file: str,
     source_file: str,
     stats: dict,
     derivative_values: np.ndarray,
-    total_area: float
+    total_area: float,
+    output_format: str = 'text'
 ) -> None:
+    if output_format == 'npz':
+        np.savez(output_file, source=np.str_(source_file), average=stats['average'],
+                 highest=stats['highest'], lowest=stats['lowest'],
+                 derivative=np.asarray(derivative_values), integral=total_area)
+        return
+
+    if output_format == 'json':
+        report = json.dumps({
+            "source": source_file,
+            **stats,
+            "derivative": np.asarray(derivative_values).tolist(),
+            "integral": total_area
+        }) + "\n"
+    else:
+        report = format_report(source_file, stats, derivative_values, total_area)
     with open(output_file, 'w', encoding="utf-8") as file:
-        file.write(f"Файл данных: {source_file}\n")
-        file.write(f"Среднее значение: {stats['average']:.4f}\n")
-        file.write(f"Максимум: {stats['highest']:.4f}\n")
-        file.write(f"Минимум: {stats['lowest']:.4f}\n")
-        file.write("Производная:\n")
-        file.write(", ".join(f"{value:.4f}" for value in derivative_values) + "\n")
-        file.write(f"Интеграл: {total_area:.4f}\n")
-        
-data_dir = Path(__file__).parent / 'data'
-x_path = data_dir / 'xc.dat'
-
-x = load_data(x_path)
-
-for fname in sorted(os.listdir(data_dir)):
-    if fname.startswith("yc-") and fname.endswith(".dat"):
-        y_path = os.path.join(data_dir, fname)
-        y = load_data(y_path)
-
-        stats = compute_stats(y)
-        deriv = get_derivative(x, y)
-        integral = calculate_area(x, y)
-
-        out_name = f"out_{fname}"
-        out_path = os.path.join(data_dir, out_name)
-        write_output(out_path, fname, stats, deriv, integral)
\ No newline at end of file
+        file.write(report)
+
+def format_report(
+    source_file: str,
+    stats: dict,
+    derivative_values: np.ndarray,
+    total_area: float
+) -> str:
+    values = np.asarray(derivative_values).tolist()
+    # Один %-шаблон на весь ряд вместо f-строки на каждое значение
+    derivative = ", ".join(["%.4f"] * len(values)) % tuple(values)
+    return (f"Файл данных: {source_file}\n"
+            f"Среднее значение: {stats['average']:.4f}\n"
+            f"Максимум: {stats['highest']:.4f}\n"
+            f"Минимум: {stats['lowest']:.4f}\n"
+            "Производная:\n"
+            f"{derivative}\n"
+            f"Интеграл: {total_area:.4f}\n")
+
+OUTPUT_SUFFIXES = {'text': '.dat', 'json': '.json', 'npz': '.npz'}
+
+def output_name(fname: str, output_format: str = 'text') -> str:
+    return f"out_{os.path.splitext(os.path.basename(fname))[0]}{OUTPUT_SUFFIXES[output_format]}"
+
+DATA_DIR = Path(__file__).parent / 'data'
+
+def list_inputs(data_dir: Path) -> list[str]:
+    return [fname for fname in sorted(os.listdir(data_dir))
+            if fname.startswith("yc-") and fname.endswith(".dat")]
+
+def process_file(x: np.ndarray, data_dir: Path, fname: str, load_mode: str = 'np',
+                 output_format: str = 'text') -> float:
+    t0 = time.perf_counter()
+    y_path = os.path.join(data_dir, fname)
+    y = load_data(y_path, load_mode)
+
+    stats = compute_stats(y)
+    deriv = get_derivative(x, y)
+    integral = calculate_area(x, y)
+
+    out_path = os.path.join(data_dir, output_name(fname, output_format))
+    write_output(out_path, fname, stats, deriv, integral, output_format)
+    return time.perf_counter() - t0
+
+def run_serial(data_dir: Path, load_mode: str = 'np',
+               output_format: str = 'text') -> list[tuple[str, float]]:
+    x = load_data(data_dir / 'xc.dat', load_mode)
+    return [(fname, process_file(x, data_dir, fname, load_mode, output_format))
+            for fname in list_inputs(data_dir)]
+
+def run_batched(data_dir: Path, load_mode: str = 'np',
+                output_format: str = 'text') -> list[tuple[str, float]]:
+    """Все ряды одной матрицей (n_series, n_points): расчёт одним вызовом на всё"""
+    x = load_data(data_dir / 'xc.dat', load_mode)
+    files = list_inputs(data_dir)
+    if not files:
+        return []
+
+    paths = [os.path.join(data_dir, fname) for fname in files]
+    if load_mode == 'np':
+        # Разбор общий на все файлы, поэтому, как и расчёт, входит только в итог
+        y_matrix = load_rows(paths)
+        load_times = [0.0] * len(files)
+    else:
+        load_times = []
+        rows = []
+        for path in paths:
+            t0 = time.perf_counter()
+            rows.append(load_data(path, load_mode))
+            load_times.append(time.perf_counter() - t0)
+        y_matrix = np.stack(rows)
+
+    stats = compute_stats_batch(y_matrix)
+    deriv = get_derivative_batch(x, y_matrix)
+    integral = calculate_area_batch(x, y_matrix)
+
+    # Время по файлу — чтение и запись; общий расчёт входит только в итог
+    timings = []
+    for row, fname in enumerate(files):
+        t0 = time.perf_counter()
+        row_stats = {key: float(values[row]) for key, values in stats.items()}
+        out_path = os.path.join(data_dir, output_name(fname, output_format))
+        write_output(out_path, fname, row_stats, deriv[row], float(integral[row]), output_format)
+        timings.append((fname, load_times[row] + time.perf_counter() - t0))
+    return timings
+
+def read_chunks(x_path: str, y_path: str,
+                chunk_size: int = 1_000_000) -> Iterator[tuple[np.ndarray, np.ndarray]]:
+    """Чтение xc.dat и yc-*.dat параллельно блоками по chunk_size значений"""
+    with open(x_path, 'r') as fx, open(y_path, 'r') as fy:
+        while True:
+            x_lines = [line for line in islice(fx, chunk_size) if line.strip()]
+            y_lines = [line for line in islice(fy, chunk_size) if line.strip()]
+            if len(x_lines) != len(y_lines):
+                raise ValueError(f"Разное число значений в {x_path} и {y_path}")
+            if not x_lines:
+                return
+            yield np.loadtxt(x_lines, ndmin=1), np.loadtxt(y_lines, ndmin=1)
+
+class StreamingAccumulator:
+    """Статистика, интеграл и производная по потоку блоков (x, y).
+
+    Среднее обновляется по Уэлфорду (слиянием среднего блока), минимум,
+    максимум и интеграл трапециями — накоплением. Производная — та же
+    центральная разность, что в np.gradient: две последние точки блока
+    переносятся в следующий, поэтому значения на стыках совпадают с
+    расчётом по всему ряду. update возвращает готовые значения
+    производной, finish — последнее.
+    """
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.mean = 0.0
+        self.highest = -np.inf
+        self.lowest = np.inf
+        self.area = 0.0
+        self._carry_x = np.empty(0)
+        self._carry_y = np.empty(0)
+
+    def update(self, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        if y.size == 0:
+            return np.empty(0)
+        self.count += y.size
+        self.mean += (float(np.mean(y)) - self.mean) * y.size / self.count
+        self.highest = max(self.highest, float(np.max(y)))
+        self.lowest = min(self.lowest, float(np.min(y)))
+
+        # Общая точка с предыдущим блоком нужна и для трапеции, и для производной
+        buf_x = np.concatenate((self._carry_x, x))
+        buf_y = np.concatenate((self._carry_y, y))
+        overlap = self._carry_x.size
+        if overlap:
+            start = overlap - 1
+            self.area += calculate_area(buf_x[start:], buf_y[start:])
+        elif y.size > 1:
+            self.area += calculate_area(x, y)
+
+        self._carry_x, self._carry_y = buf_x[-2:], buf_y[-2:]
+        if buf_y.size < 2:
+            return np.empty(0)
+        # Выдаём всё, кроме последней точки: для неё ещё нет правого соседа
+        first = 1 if overlap == 2 else 0
+        return get_derivative(buf_x, buf_y)[first:-1]
+
+    def finish(self) -> np.ndarray:
+        if self._carry_y.size < 2:
+            return np.full(self._carry_y.size, np.nan)
+        return get_derivative(self._carry_x, self._carry_y)[-1:]
+
+    def stats(self) -> dict:
+        return {"average": self.mean, "highest": self.highest, "lowest": self.lowest}
+
+def process_stream(chunks: Iterable[tuple[np.ndarray, np.ndarray]], source_file: str,
+                   output_file: str, output_format: str = 'text') -> dict:
+    """Как process_file, но по блокам и без целых массивов в памяти.
+
+    Производная пишется во временный файл по мере расчёта; отчёт
+    собирается в том же виде, что и write_output, когда известны
+    статистика и интеграл. Поддерживает форматы text и json.
+    """
+    if output_format not in ('text', 'json'):
+        raise ValueError(f"Потоковая обработка не поддерживает формат {output_format}")
+    acc = StreamingAccumulator()
+    part_file = output_file + '.part'
+    try:
+        with open(part_file, 'w+', encoding="utf-8") as part:
+            separator = ""
+            for x, y in chunks:
+                values = acc.update(x, y)
+                if values.size:
+                    part.write(separator + _format_values(values, output_format))
+                    separator = ", "
+            values = acc.finish()
+            if values.size:
+                part.write(separator + _format_values(values, output_format))
+
+            stats = acc.stats()
+            part.seek(0)
+            with open(output_file, 'w', encoding="utf-8") as out:
+                if output_format == 'json':
+                    # Ключи в том же порядке, что у write_output; массив вставляется между ними
+                    out.write(json.dumps({"source": source_file, **stats})[:-1] + ', "derivative": [')
+                    shutil.copyfileobj(part, out)
+                    out.write("], " + json.dumps({"integral": acc.area})[1:] + "\n")
+                else:
+                    out.write(f"Файл данных: {source_file}\n"
+                              f"Среднее значение: {stats['average']:.4f}\n"
+                              f"Максимум: {stats['highest']:.4f}\n"
+                              f"Минимум: {stats['lowest']:.4f}\n"
+                              "Производная:\n")
+                    shutil.copyfileobj(part, out)
+                    out.write(f"\nИнтеграл: {acc.area:.4f}\n")
+    finally:
+        if os.path.exists(part_file):
+            os.remove(part_file)
+    return {**stats, "integral": acc.area, "count": acc.count}
+
+def _format_values(values: np.ndarray, output_format: str) -> str:
+    if output_format == 'json':
+        return json.dumps(values.tolist())[1:-1]
+    return ", ".join(["%.4f"] * values.size) % tuple(values.tolist())
+
+def run_stream(data_dir: Path, chunk_size: int = 1_000_000,
+               output_format: str = 'text') -> list[tuple[str, float]]:
+    """Последовательная обработка блоками: для файлов больше памяти"""
+    timings = []
+    for fname in list_inputs(data_dir):
+        t0 = time.perf_counter()
+        chunks = read_chunks(os.path.join(data_dir, 'xc.dat'), os.path.join(data_dir, fname), chunk_size)
+        process_stream(chunks, fname, os.path.join(data_dir, output_name(fname, output_format)), output_format)
+        timings.append((fname, time.perf_counter() - t0))
+    return timings
+
+# Сетка x в процессе-обработчике: вид на общую память без копирования
+_worker_x = None
+_worker_shm = None
+
+def _init_worker(shm_name: str, shape: tuple, dtype: str) -> None:
+    global _worker_x, _worker_shm
+    from multiprocessing import shared_memory
+
+    _worker_shm = shared_memory.SharedMemory(name=shm_name)
+    _worker_x = np.ndarray(shape, dtype=dtype, buffer=_worker_shm.buf)
+
+def _process_in_worker(data_dir: Path, fname: str, load_mode: str,
+                       output_format: str) -> tuple[str, float]:
+    return fname, process_file(_worker_x, data_dir, fname, load_mode, output_format)
+
+def run_parallel(data_dir: Path, workers: int | None = None, executor: str = 'process',
+                 load_mode: str = 'np', output_format: str = 'text') -> list[tuple[str, float]]:
+    # Пулы и общая память нужны только здесь — не замедляем запуск остальных режимов
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+    from multiprocessing import shared_memory
+
+    x = load_data(data_dir / 'xc.dat', load_mode)
+    files = list_inputs(data_dir)
+
+    if executor == 'thread':
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(lambda fname: (fname, process_file(x, data_dir, fname, load_mode, output_format)),
+                                 files))
+
+    shm = shared_memory.SharedMemory(create=True, size=max(x.nbytes, 1))
+    try:
+        np.ndarray(x.shape, dtype=x.dtype, buffer=shm.buf)[:] = x
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(shm.name, x.shape, x.dtype.str)) as pool:
+            chunksize = max(1, len(files) // (4 * (workers or os.cpu_count() or 1)))
+            return list(pool.map(_process_in_worker, [data_dir] * len(files), files,
+                                 [load_mode] * len(files), [output_format] * len(files),
+                                 chunksize=chunksize))
+    finally:
+        shm.close()
+        shm.unlink()
+
+MANIFEST_NAME = '.lab1_manifest.json'
+
+def _file_digest(path: str) -> str:
+    with open(path, 'rb') as file:
+        return hashlib.file_digest(file, 'sha256').hexdigest()
+
+def _input_state(entry: os.DirEntry, previous: dict | None, trusted_before_ns: int) -> dict:
+    """Размер, mtime и sha256 входа; хэш пересчитывается, только если stat изменился.
+
+    Файлам, изменённым не раньше прошлого просмотра, stat не доверяем:
+    запись в тот же тик mtime могла не изменить ни размер, ни время.
+    """
+    info = entry.stat()
+    if (previous and previous['size'] == info.st_size and previous['mtime_ns'] == info.st_mtime_ns
+            and info.st_mtime_ns < trusted_before_ns):
+        return previous
+    return {'size': info.st_size, 'mtime_ns': info.st_mtime_ns, 'sha256': _file_digest(entry.path)}
+
+def run_incremental(data_dir: Path, load_mode: str = 'np', output_format: str = 'text',
+                    force: bool = False) -> list[tuple[str, float]]:
+    """Пересчёт только тех выходов, чьи yc-*.dat или общий xc.dat изменились.
+
+    Состояние входов (размер, mtime, sha256) и то, из каких входов
+    посчитан каждый выход, хранится в data_dir/.lab1_manifest.json.
+    Неизменный файл стоит одного stat из os.scandir, хэшируются только
+    файлы с новым размером или mtime; просто «тронутый» файл не
+    пересчитывается. Файл, который не удалось прочитать или посчитать,
+    печатается и остаётся без записи в манифесте, чтобы следующий вызов
+    взял его снова. Возвращает время по пересчитанным файлам.
+    """
+    data_dir = Path(data_dir)
+    manifest_path = data_dir / MANIFEST_NAME
+    try:
+        manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        manifest = {}
+    old_inputs = manifest.get('inputs', {})
+    outputs = manifest.get('outputs', {})
+    # Запас на грубые метки времени файловых систем (до 2 с у FAT)
+    trusted_before_ns = manifest.get('scanned_ns', 0) - 2_000_000_000
+    scanned_ns = time.time_ns()
+
+    with os.scandir(data_dir) as entries:
+        present = {entry.name: entry for entry in entries}
+    files = sorted(name for name in present if name.startswith("yc-") and name.endswith(".dat"))
+
+    # stat только для входов; выходам достаточно быть в каталоге
+    inputs = {}
+    for name in [name for name in ['xc.dat', *files] if name in present]:
+        try:
+            inputs[name] = _input_state(present[name], old_inputs.get(name), trusted_before_ns)
+        except FileNotFoundError:
+            # Удалён или переименован после scandir — считаем, что его уже нет
+            pass
+    if 'xc.dat' not in inputs:
+        raise FileNotFoundError(f"{data_dir / 'xc.dat'} не найден")
+    files = [name for name in files if name in inputs]
+    xc_digest = inputs['xc.dat']['sha256']
+
+    stale = []
+    for fname in files:
+        out = output_name(fname, output_format)
+        expected = {'source': inputs[fname]['sha256'], 'xc': xc_digest}
+        if force or out not in present or outputs.get(out) != expected:
+            stale.append((fname, out, expected))
+
+    timings = []
+    if stale:
+        try:
+            x = load_data(data_dir / 'xc.dat', load_mode)
+        except Exception as e:
+            print(f"Не удалось прочитать xc.dat: {e}")
+            stale = []
+        for fname, out, expected in stale:
+            outputs.pop(out, None)
+            try:
+                timings.append((fname, process_file(x, data_dir, fname, load_mode, output_format)))
+            except Exception as e:
+                print(f"Не удалось обработать {fname}: {e}")
+                continue
+            outputs[out] = expected
+
+    removed = old_inputs.keys() - inputs.keys()
+    if removed:
+        gone = {output_name(fname, fmt) for fname in removed for fmt in OUTPUT_SUFFIXES}
+        outputs = {out: source for out, source in outputs.items() if out not in gone}
+    # Перезаписываем манифест, только если что-то хэшировали или пересчитали
+    rehashed = any(state is not old_inputs.get(name) for name, state in inputs.items())
+    if rehashed or removed or timings:
+        tmp = manifest_path.with_name(f"{MANIFEST_NAME}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps({'scanned_ns': scanned_ns, 'inputs': inputs, 'outputs': outputs}),
+                       encoding="utf-8")
+        os.replace(tmp, manifest_path)
+    return timings
+
+def watch(data_dir: Path, interval: float = 1.0, load_mode: str = 'np', output_format: str = 'text',
+          verbose: bool = False) -> None:
+    """Опрос каталога раз в interval секунд без inotify: новые и изменённые входы пересчитываются.
+
+    Файл, пойманный посреди записи, либо посчитается по недописанным
+    данным и будет пересчитан, когда у него сменятся размер или mtime,
+    либо упадёт с ошибкой — тогда ошибка печатается, а файл берётся
+    снова на следующем опросе. Так же печатается и пропускается опрос,
+    во время которого, например, на миг пропал xc.dat.
+    """
+    while True:
+        t0 = time.perf_counter()
+        try:
+            timings = run_incremental(data_dir, load_mode, output_format)
+        except Exception as e:
+            # Например, xc.dat на миг пропал: следующий опрос попробует снова
+            print(f"Ошибка при опросе {data_dir}: {e}")
+            timings = []
+        if timings:
+            report(timings, time.perf_counter() - t0, verbose)
+        time.sleep(interval)
+
+def report(timings: list[tuple[str, float]], elapsed: float, verbose: bool = False) -> None:
+    if verbose:
+        for fname, duration in timings:
+            print(f"{fname}: {duration * 1000:.2f} мс")
+    rate = len(timings) / elapsed if elapsed > 0 else float('inf')
+    print(f"Обработано файлов: {len(timings)} за {elapsed:.3f} сек. ({rate:.1f} файлов/сек.)")
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Статистика, производная и интеграл для yc-*.dat")
+    parser.add_argument('data_dir', nargs='?', type=Path, default=DATA_DIR)
+    parser.add_argument('--mode', choices=['serial', 'batch', 'process', 'thread'], default='serial',
+                        help="serial — последовательная эталонная обработка, "
+                             "batch — все ряды одной матрицей")
+    parser.add_argument('--workers', type=int, default=None, help="размер пула (по умолчанию число ядер)")
+    parser.add_argument('--load', choices=['np', 'open', 'cache'], default='np',
+                        help="cache — читать через бинарный кэш .npy рядом с данными "
+                             "(с --mode batch окупается на рядах от ~500 значений)")
+    parser.add_argument('--format', choices=list(OUTPUT_SUFFIXES), default='text',
+                        help="text — прежний out_*.dat, json — строка JSON, npz — массивы numpy")
+    parser.add_argument('--rebuild-cache', action='store_true', help="заново собрать кэш и выйти")
+    parser.add_argument('--clear-cache', action='store_true', help="удалить кэш и выйти")
+    parser.add_argument('--stream', action='store_true',
+                        help="читать блоками и не держать ряды в памяти (форматы text и json)")
+    parser.add_argument('--chunk-size', type=int, default=1_000_000, help="значений в блоке для --stream")
+    parser.add_argument('--incremental', action='store_true',
+                        help="пересчитать только выходы изменившихся входов (манифест в data_dir)")
+    parser.add_argument('--watch', type=float, metavar='SECONDS', default=None,
+                        help="опрашивать каталог с этим интервалом и пересчитывать изменения")
+    parser.add_argument('--force', action='store_true', help="с --incremental: пересчитать всё")
+    parser.add_argument('-v', '--verbose', action='store_true', help="время по каждому файлу")
+    args = parser.parse_args(argv)
+    if args.stream and args.format == 'npz':
+        parser.error("--stream поддерживает только форматы text и json")
+
+    if args.clear_cache:
+        print(f"Удалено файлов кэша: {clear_cache(args.data_dir)}")
+        return
+    if args.rebuild_cache:
+        print(f"Кэш пересобран для файлов: {build_cache(args.data_dir)}")
+        return
+
+    if args.watch is not None:
+        print(f"Слежение за {args.data_dir}, интервал {args.watch} сек. (Ctrl+C — выход)")
+        try:
+            watch(args.data_dir, args.watch, args.load, args.format, args.verbose)
+        except KeyboardInterrupt:
+            pass
+        return
+
+    t0 = time.perf_counter()
+    if args.incremental:
+        timings = run_incremental(args.data_dir, args.load, args.format, args.force)
+    elif args.stream:
+        timings = run_stream(args.data_dir, args.chunk_size, args.format)
+    elif args.mode == 'serial':
+        timings = run_serial(args.data_dir, args.load, args.format)
+    elif args.mode == 'batch':
+        timings = run_batched(args.data_dir, args.load, args.format)
+    else:
+        timings = run_parallel(args.data_dir, args.workers, args.mode, args.load, args.format)
+    report(timings, time.perf_counter() - t0, args.verbose)
+
+if __name__ == "__main__":
+    main()
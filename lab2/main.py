@@ -1,145 +1,394 @@
-import pandas as pd
-import matplotlib.pyplot as plt
+import io
+import os
+import json
+import time
+import hashlib
+import argparse
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
 import numpy as np
-import matplotlib.pyplot as plt
+import pandas as pd
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 import matplotlib.gridspec as gridspec
-from pathlib import Path
 
-path = Path(__file__).parent / 'data' / 'company_sales_data.csv'
-data = pd.read_csv(path)
-
-plt.figure()
-plt.plot(data['month_number'], data['total_profit'], color='blue', linewidth=2)
-plt.xlabel("Month number")
-plt.ylabel("Profit in dollar")
-plt.title("Company profit per month")
-plt.ylim([100000, 500000])
-plt.grid(True)
-plt.savefig("task1.png")
-plt.show()
-
-plt.figure()
-plt.plot(
-    data['month_number'],
-    data['total_units'],
-    color='red',
-    linestyle='--',
-    linewidth=3,
-    marker='o',
-    markerfacecolor='black',
-    label='Profit data of last year'
-)
-plt.xlabel("Month Number")
-plt.ylabel("Units Sold")
-plt.title("Company Sales data of last year")
-plt.legend(loc='lower right')
-plt.grid(True)
-plt.savefig("task2.png")
-plt.show()
-
-plt.figure()
-plt.plot(data['month_number'], data['facecream'], label='Face cream Sales Data', marker='o')
-plt.plot(data['month_number'], data['facewash'], label='Face Wash Sales Data', marker='o')
-plt.plot(data['month_number'], data['toothpaste'], label='ToothPaste Sales Data', marker='o')
-plt.plot(data['month_number'], data['bathingsoap'], label='Bathingsoap Sales Data', marker='o')
-plt.plot(data['month_number'], data['shampoo'], label='Shampoo Sales Data', marker='o')
-plt.plot(data['month_number'], data['moisturizer'], label='Moisturizer Sales Data', marker='o')
-plt.xlabel("Month Number")
-plt.ylabel("Sales units in number")
-plt.title("Sales data")
-plt.legend()
-plt.grid(True)
-plt.savefig("task3_1.png")
-plt.show()
-
-fig = plt.figure()
-plt.plot(data['month_number'], data['bathingsoap'], color='black', marker='o')
-plt.title("Sales data of a Bathingsoap")
-plt.xlabel("Month Number")
-plt.ylabel("Sales units in number")
-plt.grid(True)
-fig.savefig("task3_2_bathingsoap.png")
-
-
-fig = plt.figure()
-plt.plot(data['month_number'], data['facewash'], color='red', marker='o')
-plt.title("Sales data of a facewash")
-plt.xlabel("Month Number")
-plt.ylabel("Sales units in number")
-plt.grid(True)
-fig.savefig("task3_2_facewash.png")
-plt.show()
-
-plt.figure()
-plt.scatter(data['month_number'], data['toothpaste'], label='Tooth paste Sales data', color='blue')
-plt.xlabel("Month Number")
-plt.ylabel("Number of units Sold")
-plt.title("Tooth paste Sales data")
-plt.grid(True, linestyle='--')
-plt.legend()
-plt.savefig("task4.png")
-plt.show()
-
-
-plt.figure()
-bar_width = 0.4
-months = data['month_number']
-x_indexes = np.arange(len(months))
-
-plt.bar(x_indexes - bar_width/2, data['facecream'], width=bar_width, label='Face Cream sales data', color='blue')
-plt.bar(x_indexes + bar_width/2, data['facewash'], width=bar_width, label='Face Wash sales data', color='orange')
-
-plt.xlabel("Month Number")
-plt.ylabel("Sales units in number")
-plt.title("Facewash and facecream sales data")
-plt.xticks(ticks=x_indexes, labels=months)
-plt.legend()
-plt.grid(True, axis='y', linestyle='--')
-plt.savefig("task5.png")
-plt.show()
-
-
-plt.figure()
-
-product_labels = ['FaceCream', 'FaseWash', 'ToothPaste', 'Bathing soap', 'Shampoo', 'Moisturizer']
-product_columns = ['facecream', 'facewash', 'toothpaste', 'bathingsoap', 'shampoo', 'moisturizer']
-product_totals = [data[col].sum() for col in product_columns]
-
-plt.pie(product_totals, labels=product_labels, autopct='%1.1f%%', startangle=90)
-plt.title("SALES DATA")
-plt.axis('equal') 
-plt.legend(product_labels, loc='lower right')
-plt.savefig("task6.png")
-plt.show()
-
-plt.figure()
-
-months = data['month_number']
-labels = ["face Cream", "Face wash", "Tooth paste", "Bathing soap", "Shampoo", "Moisturizer"]
-colors = ['magenta', 'cyan', 'red', 'black', 'green', 'yellow']
-stack_data = [data['facecream'], data['facewash'], data['toothpaste'],
-              data['bathingsoap'], data['shampoo'], data['moisturizer']]
-
-plt.stackplot(months, *stack_data, labels=labels, colors=colors)
-plt.xlabel("Month Number")
-plt.ylabel("Sales units in Number")
-plt.title("Alll product sales data using stack plot")
-plt.legend(loc='upper left')
-plt.savefig("task7.png")
-plt.show()
+LAB_DIR = Path(__file__).parent
+CSV_PATH = LAB_DIR / 'data' / 'company_sales_data.csv'
+MANIFEST_NAME = '.render_manifest.json'
+AGGREGATES_NAME = '.sales_aggregates.json'
 
-import matplotlib.gridspec as gridspec
+PRODUCT_COLUMNS = ['facecream', 'facewash', 'toothpaste', 'bathingsoap', 'shampoo', 'moisturizer']
+
+
+def new_figure(**kwargs):
+    # Фигура без pyplot: своё полотно Agg, никакого глобального состояния и GUI
+    fig = Figure(**kwargs)
+    FigureCanvasAgg(fig)
+    return fig
+
+
+def task1(data):
+    fig = new_figure()
+    ax = fig.add_subplot()
+    ax.plot(data['month_number'], data['total_profit'], color='blue', linewidth=2)
+    ax.set_xlabel("Month number")
+    ax.set_ylabel("Profit in dollar")
+    ax.set_title("Company profit per month")
+    ax.set_ylim([100000, 500000])
+    ax.grid(True)
+    return fig
+
+
+def task2(data):
+    fig = new_figure()
+    ax = fig.add_subplot()
+    ax.plot(
+        data['month_number'],
+        data['total_units'],
+        color='red',
+        linestyle='--',
+        linewidth=3,
+        marker='o',
+        markerfacecolor='black',
+        label='Profit data of last year'
+    )
+    ax.set_xlabel("Month Number")
+    ax.set_ylabel("Units Sold")
+    ax.set_title("Company Sales data of last year")
+    ax.legend(loc='lower right')
+    ax.grid(True)
+    return fig
+
+
+def task3_1(data):
+    fig = new_figure()
+    ax = fig.add_subplot()
+    ax.plot(data['month_number'], data['facecream'], label='Face cream Sales Data', marker='o')
+    ax.plot(data['month_number'], data['facewash'], label='Face Wash Sales Data', marker='o')
+    ax.plot(data['month_number'], data['toothpaste'], label='ToothPaste Sales Data', marker='o')
+    ax.plot(data['month_number'], data['bathingsoap'], label='Bathingsoap Sales Data', marker='o')
+    ax.plot(data['month_number'], data['shampoo'], label='Shampoo Sales Data', marker='o')
+    ax.plot(data['month_number'], data['moisturizer'], label='Moisturizer Sales Data', marker='o')
+    ax.set_xlabel("Month Number")
+    ax.set_ylabel("Sales units in number")
+    ax.set_title("Sales data")
+    ax.legend()
+    ax.grid(True)
+    return fig
+
+
+def task3_2_bathingsoap(data):
+    fig = new_figure()
+    ax = fig.add_subplot()
+    ax.plot(data['month_number'], data['bathingsoap'], color='black', marker='o')
+    ax.set_title("Sales data of a Bathingsoap")
+    ax.set_xlabel("Month Number")
+    ax.set_ylabel("Sales units in number")
+    ax.grid(True)
+    return fig
+
+
+def task3_2_facewash(data):
+    fig = new_figure()
+    ax = fig.add_subplot()
+    ax.plot(data['month_number'], data['facewash'], color='red', marker='o')
+    ax.set_title("Sales data of a facewash")
+    ax.set_xlabel("Month Number")
+    ax.set_ylabel("Sales units in number")
+    ax.grid(True)
+    return fig
+
+
+def task4(data):
+    fig = new_figure()
+    ax = fig.add_subplot()
+    ax.scatter(data['month_number'], data['toothpaste'], label='Tooth paste Sales data', color='blue')
+    ax.set_xlabel("Month Number")
+    ax.set_ylabel("Number of units Sold")
+    ax.set_title("Tooth paste Sales data")
+    ax.grid(True, linestyle='--')
+    ax.legend()
+    return fig
+
+
+def task5(data):
+    fig = new_figure()
+    ax = fig.add_subplot()
+    bar_width = 0.4
+    months = data['month_number']
+    x_indexes = np.arange(len(months))
+
+    ax.bar(x_indexes - bar_width/2, data['facecream'], width=bar_width, label='Face Cream sales data', color='blue')
+    ax.bar(x_indexes + bar_width/2, data['facewash'], width=bar_width, label='Face Wash sales data', color='orange')
+
+    ax.set_xlabel("Month Number")
+    ax.set_ylabel("Sales units in number")
+    ax.set_title("Facewash and facecream sales data")
+    ax.set_xticks(x_indexes, labels=months)
+    ax.legend()
+    ax.grid(True, axis='y', linestyle='--')
+    return fig
+
+
+def task6(data):
+    fig = new_figure()
+    ax = fig.add_subplot()
+
+    product_labels = ['FaceCream', 'FaseWash', 'ToothPaste', 'Bathing soap', 'Shampoo', 'Moisturizer']
+    product_totals = [data[col].sum() for col in PRODUCT_COLUMNS]
+
+    ax.pie(product_totals, labels=product_labels, autopct='%1.1f%%', startangle=90)
+    ax.set_title("SALES DATA")
+    ax.axis('equal')
+    ax.legend(product_labels, loc='lower right')
+    return fig
+
+
+def task7(data):
+    fig = new_figure()
+    ax = fig.add_subplot()
+
+    months = data['month_number']
+    labels = ["face Cream", "Face wash", "Tooth paste", "Bathing soap", "Shampoo", "Moisturizer"]
+    colors = ['magenta', 'cyan', 'red', 'black', 'green', 'yellow']
+    stack_data = [data[col] for col in PRODUCT_COLUMNS]
+
+    ax.stackplot(months, *stack_data, labels=labels, colors=colors)
+    ax.set_xlabel("Month Number")
+    ax.set_ylabel("Sales units in Number")
+    ax.set_title("Alll product sales data using stack plot")
+    ax.legend(loc='upper left')
+    return fig
+
+
+def task8(data):
+    fig = new_figure(figsize=(16, 16))
+    gs = gridspec.GridSpec(4, 2, figure=fig)
+
+    for i in range(4):
+        for j in range(2):
+            ax = fig.add_subplot(gs[i, j])
+            ax.set_title(f"{i * 2 + j + 1}")
+            ax.axis('on')
+
+    fig.suptitle("Заготовочка", fontsize=22)
+    fig.tight_layout()
+    return fig
+
+
+# Линейные графики и точечная диаграмма, которые можно прореживать
+LINE_CHARTS = {'task1', 'task2', 'task3_1', 'task3_2_bathingsoap', 'task3_2_facewash', 'task4'}
+
+# Имя графика (и файла) -> функция построения и столбцы, от которых он зависит
+CHARTS = {
+    'task1': (task1, ['month_number', 'total_profit']),
+    'task2': (task2, ['month_number', 'total_units']),
+    'task3_1': (task3_1, ['month_number', *PRODUCT_COLUMNS]),
+    'task3_2_bathingsoap': (task3_2_bathingsoap, ['month_number', 'bathingsoap']),
+    'task3_2_facewash': (task3_2_facewash, ['month_number', 'facewash']),
+    'task4': (task4, ['month_number', 'toothpaste']),
+    'task5': (task5, ['month_number', 'facecream', 'facewash']),
+    'task6': (task6, PRODUCT_COLUMNS),
+    'task7': (task7, ['month_number', *PRODUCT_COLUMNS]),
+    'task8': (task8, []),
+}
+
+
+def data_fingerprint(data, columns):
+    digest = hashlib.sha256(','.join(columns).encode())
+    if columns:
+        digest.update(pd.util.hash_pandas_object(data[columns], index=False).values.tobytes())
+    return digest.hexdigest()
+
+
+# Копия gm.main._bucket_extremes: python lab2/main.py запускается без корня репозитория
+# в sys.path, и импорт из gm в процессах-обработчиках не работает. Менять вместе.
+def _bucket_extremes(bucket, values, positions):
+    """Индексы минимума и максимума values[positions] в каждой корзине"""
+    if positions.size == 0:
+        return positions
+    order = positions[np.lexsort((values[positions], bucket[positions]))]
+    sorted_buckets = bucket[order]
+    starts = np.flatnonzero(np.r_[True, sorted_buckets[1:] != sorted_buckets[:-1]])
+    ends = np.r_[starts[1:], order.size] - 1
+    return np.concatenate((order[starts], order[ends]))
+
+
+def decimate_rows(data, max_points):
+    """Строки, нужные для прореживания всех рядов графика: min/max по корзинам.
+
+    Диапазон month_number делится на max_points // 2 корзин; для каждого
+    столбца в корзине остаются строки с его минимумом и максимумом и
+    первая строка с пропуском, чтобы разрыв линии не пропал.
+    """
+    months = data['month_number'].to_numpy(dtype=float)
+    n_buckets = max(1, max_points // 2)
+    span = float(months[-1] - months[0]) or 1.0
+    bucket = np.minimum(((months - months[0]) / span * n_buckets).astype(np.int64), n_buckets - 1)
+
+    rows = [np.array([0, len(data) - 1])]
+    for column in data.columns:
+        if column == 'month_number':
+            continue
+        values = data[column].to_numpy(dtype=float)
+        nan = np.isnan(values)
+        rows.append(_bucket_extremes(bucket, values, np.flatnonzero(~nan)))
+        gaps = np.flatnonzero(nan)
+        rows.append(gaps[np.unique(bucket[gaps], return_index=True)[1]])
+    return data.iloc[np.unique(np.concatenate(rows))]
+
+
+def render_chart(name, data, output_path, max_points=None):
+    t0 = time.perf_counter()
+    build, _ = CHARTS[name]
+    if max_points is not None and name in LINE_CHARTS and len(data) > max_points:
+        data = decimate_rows(data, max_points)
+    fig = build(data)
+    fig.savefig(output_path)
+    return time.perf_counter() - t0
+
+
+# Сколько байт перед сохранённым смещением сверяем, чтобы заметить перезапись файла
+_TAIL_CHECK = 256
+
+
+def _empty_aggregates(csv_path, header):
+    return {
+        'csv_path': str(Path(csv_path).resolve()),
+        'header': header.decode(),
+        'offset': len(header),
+        'tail': header[-_TAIL_CHECK:].hex(),
+        'rows': 0,
+        'monthly': {},
+    }
+
+
+def update_aggregates(csv_path, state_path):
+    """Накопительные суммы по файлу продаж с чтением только новых строк.
+
+    В state_path хранятся смещение уже учтённой части файла и суммы по
+    month_number (monthly) — из них строятся все графики. Если у файла
+    сменился заголовок, он стал короче или изменились байты перед
+    смещением, суммы пересчитываются с нуля. Последняя строка без
+    перевода строки может быть недописана: она учитывается, когда
+    размер файла не изменился с прошлого запуска, а до тех пор
+    печатается предупреждение.
+    """
+    state_path = Path(state_path)
+    state = json.loads(state_path.read_text()) if state_path.exists() else None
+
+    with open(csv_path, 'rb') as f:
+        header = f.readline()
+        size = os.fstat(f.fileno()).st_size
+        if state is not None:
+            tail = bytes.fromhex(state['tail'])
+            f.seek(state['offset'] - len(tail))
+            if (state['csv_path'] != str(Path(csv_path).resolve()) or state['header'] != header.decode()
+                    or size < state['offset'] or f.read(len(tail)) != tail
+                    # Учтённую строку без перевода строки дописали — она уже другая
+                    or state.get('open_row') and f.read(1) not in (b'', b'\r', b'\n')):
+                state = None
+        if state is None:
+            state = _empty_aggregates(csv_path, header)
+        f.seek(state['offset'])
+        chunk = f.read()
+
+    complete = chunk[:chunk.rfind(b'\n') + 1]
+    open_row = False
+    if chunk[len(complete):].strip():
+        if state.get('size') == size:
+            complete, open_row = chunk, True
+        else:
+            print(f"Предупреждение: последняя строка {csv_path} без перевода строки; "
+                  "она будет учтена при следующем запуске, если файл не изменится")
+    changed = state.get('size') != size
+    state['size'] = size
+    if complete.strip():
+        rows = pd.read_csv(io.BytesIO(header + complete))
+        for month, sums in rows.groupby('month_number').sum(numeric_only=True).to_dict(orient='index').items():
+            monthly = state['monthly'].setdefault(str(month), {})
+            for column, value in sums.items():
+                monthly[column] = monthly.get(column, 0) + value
+        state['rows'] += len(rows)
+        state['offset'] += len(complete)
+        state['open_row'] = open_row
+        state['tail'] = (bytes.fromhex(state['tail']) + complete)[-_TAIL_CHECK:].hex()
+        changed = True
+    if changed:
+        tmp = state_path.with_name(state_path.name + '.tmp')
+        tmp.write_text(json.dumps(state))
+        os.replace(tmp, state_path)
+    return state
+
+
+def aggregates_frame(state):
+    """Помесячные суммы в виде таблицы с теми же столбцами, что и CSV"""
+    columns = [c for c in state['header'].strip().split(',') if c != 'month_number']
+    frame = pd.DataFrame.from_dict(state['monthly'], orient='index', columns=columns)
+    frame.index = frame.index.astype(int)
+    frame = frame.sort_index().rename_axis('month_number').reset_index()
+    return frame
+
+
+def build_report(csv_path=CSV_PATH, output_dir=LAB_DIR, workers=None, force=False, max_points=None):
+    """Строит графики task1–task8 в output_dir в параллельных процессах.
+
+    Данные берутся из накопительных сумм (update_aggregates), так что
+    каждый запуск читает только дописанные в CSV строки. Графики, у
+    которых не изменились нужные им столбцы и есть готовый файл,
+    пропускаются (отпечатки данных хранятся в output_dir/.render_manifest.json).
+    max_points прореживает линейные графики (LINE_CHARTS) до порядка
+    max_points точек на ряд. Возвращает {имя: время построения в секундах
+    или None, если пропущен}.
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = output_dir / MANIFEST_NAME
+    manifest = json.loads(manifest_path.read_text()) if manifest_path.exists() else {}
+
+    data = aggregates_frame(update_aggregates(csv_path, output_dir / AGGREGATES_NAME))
+    timings = {}
+    todo = {}
+    for name, (_, columns) in CHARTS.items():
+        fingerprint = data_fingerprint(data, columns)
+        if max_points is not None and name in LINE_CHARTS:
+            fingerprint += f":{max_points}"
+        output_path = output_dir / f"{name}.png"
+        if not force and manifest.get(name) == fingerprint and output_path.exists():
+            timings[name] = None
+        else:
+            todo[name] = (fingerprint, output_path)
+
+    if todo:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {name: pool.submit(render_chart, name, data[CHARTS[name][1]], path, max_points)
+                       for name, (_, path) in todo.items()}
+            for name, future in futures.items():
+                timings[name] = future.result()
+                manifest[name] = todo[name][0]
+        manifest_path.write_text(json.dumps(manifest, indent=4))
+
+    return {name: timings[name] for name in CHARTS}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Графики продаж компании")
+    parser.add_argument('csv_path', nargs='?', type=Path, default=CSV_PATH)
+    parser.add_argument('-o', '--output-dir', type=Path, default=LAB_DIR)
+    parser.add_argument('--workers', type=int, default=None, help="число процессов (по умолчанию по числу ядер)")
+    parser.add_argument('--force', action='store_true', help="перестроить все графики")
+    parser.add_argument('--max-points', type=int, default=None,
+                        help="прореживать линейные графики до примерно стольких точек")
+    args = parser.parse_args(argv)
 
-fig = plt.figure(figsize=(16, 16))
-gs = gridspec.GridSpec(4, 2, figure=fig)
+    t0 = time.perf_counter()
+    timings = build_report(args.csv_path, args.output_dir, args.workers, args.force, args.max_points)
+    for name, duration in timings.items():
+        status = "без изменений, пропущен" if duration is None else f"{duration:.3f} сек."
+        print(f"{name}: {status}")
+    print(f"Всего: {time.perf_counter() - t0:.3f} сек.")
 
-for i in range(4):
-    for j in range(2):
-        ax = fig.add_subplot(gs[i, j])
-        ax.set_title(f"{i * 2 + j + 1}")
-        ax.axis('on')
 
-fig.suptitle("Заготовочка", fontsize=22)
-plt.tight_layout()
-plt.savefig("task8.png")
-plt.show()
+if __name__ == "__main__":
+    main()
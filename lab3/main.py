@@ -1,8 +1,18 @@
+import os
+import json
 import time
+import queue
+import atexit
+import asyncio
+import cProfile
+import inspect
 import functools
+import itertools
+from collections import Counter, OrderedDict, deque
+from contextlib import nullcontext
 from datetime import datetime
-from threading import Lock
-from typing import Any, Callable, TypeVar
+from threading import Lock, Thread
+from typing import Any, Callable, NamedTuple, TypeVar
 
 F = TypeVar("F", bound=Callable)
 
@@ -34,6 +44,112 @@ def log_decorator(func: Callable) -> Callable:
     return wrapper
 
 
+class LogWriter:
+    """Фоновая запись лога: декорированная функция только кладёт запись в очередь.
+
+    Поток-писатель держит файл открытым, форматирует записи сам и сбрасывает
+    их пачками — по batch_size записей или раз в flush_interval секунд.
+    При завершении интерпретатора остаток очереди дописывается (atexit).
+    """
+
+    _STOP = object()
+
+    def __init__(self, filename: str = "log.txt", batch_size: int = 1000,
+                 flush_interval: float = 0.5) -> None:
+        self.filename = filename
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.SimpleQueue()
+        self._thread = Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def put(self, record: tuple) -> None:
+        self._queue.put(record)
+
+    def close(self) -> None:
+        if self._thread.is_alive():
+            self._queue.put(self._STOP)
+            self._thread.join()
+
+    def _run(self) -> None:
+        pending = []
+        deadline = time.monotonic() + self.flush_interval
+        with open(self.filename, "a", encoding="utf-8") as f:
+            while True:
+                try:
+                    record = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    record = None
+                if record is self._STOP:
+                    break
+                if record is not None:
+                    pending.append(self._format(record))
+                if pending and (len(pending) >= self.batch_size or time.monotonic() >= deadline):
+                    f.write("".join(pending))
+                    f.flush()
+                    pending.clear()
+                if time.monotonic() >= deadline:
+                    deadline = time.monotonic() + self.flush_interval
+            # Забираем всё, что успели положить до остановки
+            while True:
+                try:
+                    record = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if record is not self._STOP:
+                    pending.append(self._format(record))
+            f.write("".join(pending))
+
+    @staticmethod
+    def _format(record: tuple) -> str:
+        kind, name, timestamp_ns, payload = record
+        stamp = datetime.fromtimestamp(timestamp_ns / 1e9).strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
+        if kind == "call":
+            return f"[{stamp}] Функция '{name}' вызвана с аргументами: {payload}\n"
+        if kind == "error":
+            return f"[{stamp}] Ошибка в функции '{name}': {str(payload)}\n"
+        return (f"[{stamp}] Функция '{name}' завершена. "
+                f"Время выполнения: {payload / 1e9:.9f} сек.\n")
+
+
+_log_writers: dict[str, LogWriter] = {}
+_log_writers_lock = Lock()
+
+def get_log_writer(filename: str = "log.txt") -> LogWriter:
+    with _log_writers_lock:
+        if filename not in _log_writers:
+            _log_writers[filename] = LogWriter(filename)
+        return _log_writers[filename]
+
+
+def buffered_log_decorator(filename: str = "log.txt",
+                           writer: LogWriter | None = None) -> Callable[[Callable], Callable]:
+    """Как log_decorator, но запись идёт через фоновый LogWriter.
+
+    Аргументы сохраняются как есть и превращаются в строку уже в потоке
+    записи, поэтому изменяемые аргументы попадут в лог в состоянии на
+    момент записи. Длительность — по time.perf_counter_ns.
+    """
+    def decorator(func: Callable) -> Callable:
+        put = (writer or get_log_writer(filename)).put
+        name = func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            put(("call", name, time.time_ns(), args))
+            t0 = time.perf_counter_ns()
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                put(("error", name, time.time_ns(), e))
+                raise
+            put(("done", name, time.time_ns(), time.perf_counter_ns() - t0))
+            return result
+        return wrapper
+    return decorator
+
+
 @log_decorator
 def calculate(a: float, b: float, operation: str) -> float:
     match operation:
@@ -49,22 +165,137 @@ def calculate(a: float, b: float, operation: str) -> float:
             raise ValueError("Неподдерживаемая операция")
 
 
-def rate_limit(max_calls: int, period: float) -> Callable[[Callable], Callable]:
-    lock = Lock()
+class RateLimitExceeded(Exception):
+    def __init__(self, retry_after: float) -> None:
+        super().__init__("Превышен лимит вызовов. Попробуйте позже.")
+        self.retry_after = retry_after
+
+
+# Возвращается вместо результата при on_reject="sentinel"
+RATE_LIMITED = object()
+
+
+class SlidingWindow:
+    """Не больше max_calls вызовов за любые period секунд"""
+
+    def __init__(self, max_calls: int, period: float) -> None:
+        self.max_calls = max_calls
+        self.period = period
+        self.calls = deque()
+
+    def acquire(self, now: float) -> float:
+        """0, если вызов разрешён (и учтён), иначе сколько секунд ждать"""
+        calls = self.calls
+        while calls and now - calls[0] >= self.period:
+            calls.popleft()
+        if len(calls) < self.max_calls:
+            calls.append(now)
+            return 0.0
+        return calls[-self.max_calls] + self.period - now
+
+    def reserve(self, now: float) -> float:
+        """Как acquire, но вызов учитывается всегда — в момент now + задержка.
+
+        Следующий reserve получает место после уже занятых, поэтому
+        ожидающие проходят в порядке обращения.
+        """
+        delay = self.acquire(now)
+        if delay > 0:
+            self.calls.append(now + delay)
+        return delay
+
+    def idle(self, now: float) -> bool:
+        """Окно пусто: лимитер можно выбросить и создать заново"""
+        return not self.calls or now - self.calls[-1] >= self.period
+
+
+class TokenBucket:
+    """Ведро на max_calls жетонов, пополняется со скоростью max_calls / period"""
+
+    def __init__(self, max_calls: int, period: float) -> None:
+        self.capacity = max_calls
+        self.rate = max_calls / period
+        self.tokens = float(max_calls)
+        self.updated = time.monotonic()
+
+    def acquire(self, now: float) -> float:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def reserve(self, now: float) -> float:
+        """Как acquire, но жетон берётся всегда, в долг: очередь в порядке обращения"""
+        delay = self.acquire(now)
+        if delay > 0:
+            self.tokens -= 1
+        return delay
+
+    def idle(self, now: float) -> bool:
+        """Ведро успело наполниться: лимитер можно выбросить и создать заново"""
+        return self.tokens + (now - self.updated) * self.rate >= self.capacity
+
+
+LIMITERS = {"window": SlidingWindow, "bucket": TokenBucket}
+
+# Меньше стольких лимитеров по ключам rate_limit не чистит
+_SWEEP_MIN = 64
+
+
+def rate_limit(max_calls: int, period: float, strategy: str = "window",
+               key: Callable[..., Any] | None = None,
+               on_reject: str = "raise") -> Callable[[Callable], Callable]:
+    """Ограничение частоты вызовов.
+
+    strategy — "window" (скользящее окно) или "bucket" (token bucket);
+    key(*args, **kwargs) даёт отдельный лимит на каждое значение, например
+    на id пользователя. Отклонённый синхронный вызов бросает
+    RateLimitExceeded или, при on_reject="sentinel", возвращает
+    RATE_LIMITED. Для async def вызов не отбрасывается, а ждёт своей очереди:
+    место занимается сразу, так что ожидающие проходят в порядке вызова.
+    Лимитеры ключей, по которым давно не было вызовов, выбрасываются.
+    """
+    limiter_class = LIMITERS[strategy]
 
     def decorator(func: Callable) -> Callable:
-        calls = []
+        lock = Lock()
+        limiters = {}
+        sweep_at = _SWEEP_MIN
+
+        def acquire(args: tuple, kwargs: dict, reserve: bool = False) -> float:
+            nonlocal sweep_at
+            limiter_key = key(*args, **kwargs) if key else None
+            now = time.monotonic()
+            with lock:
+                limiter = limiters.get(limiter_key)
+                if limiter is None:
+                    # Чистка при удвоении словаря: в среднем O(1) на вызов
+                    if len(limiters) >= sweep_at:
+                        for idle_key in [k for k, lim in limiters.items() if lim.idle(now)]:
+                            del limiters[idle_key]
+                        sweep_at = max(_SWEEP_MIN, 2 * len(limiters))
+                    limiter = limiters[limiter_key] = limiter_class(max_calls, period)
+                return limiter.reserve(now) if reserve else limiter.acquire(now)
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                delay = acquire(args, kwargs, reserve=True)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                return await func(*args, **kwargs)
+            return async_wrapper
 
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
-            now = time.time()
-            with lock:
-                nonlocal calls
-                calls = [call for call in calls if now - call < period]
-                if len(calls) < max_calls:
-                    calls.append(now)
-                    return func(*args, **kwargs)
-                print("Превышен лимит вызовов. Попробуйте позже.")
+            delay = acquire(args, kwargs)
+            if delay > 0:
+                if on_reject == "sentinel":
+                    return RATE_LIMITED
+                raise RateLimitExceeded(delay)
+            return func(*args, **kwargs)
         return wrapper
     return decorator
 
@@ -74,17 +305,78 @@ def send_message(message: str) -> None:
     print(f"Сообщение отправлено: {message}")
 
 
-def cache_decorator(func: Callable) -> Callable:
-    cache = {}
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    evictions: int
+    maxsize: int | None
+    currsize: int
 
-    @functools.wraps(func)
-    def wrapper(*args: Any) -> Any:
-        if args in cache:
-            return cache[args]
-        result = func(*args)
-        cache[args] = result
-        return result
-    return wrapper
+
+_KWARGS_MARK = object()
+
+
+def cache_decorator(func: Callable | None = None, *, maxsize: int | None = 128,
+                    ttl: float | None = None, thread_safe: bool = False) -> Callable:
+    """Кэш результатов с вытеснением LRU и сроком жизни записей.
+
+    Можно писать и @cache_decorator, и @cache_decorator(maxsize=..., ttl=...).
+    maxsize=None — без ограничения размера, ttl — секунды жизни записи.
+    Ключ учитывает именованные аргументы. thread_safe=True защищает
+    словарь блокировкой; сама функция вызывается вне её, поэтому
+    рекурсия (как в fibonacci) не блокируется. У обёртки есть cache_info()
+    и cache_clear(), как у functools.lru_cache.
+    """
+    def decorator(func: Callable) -> Callable:
+        cache = OrderedDict()
+        lock = Lock() if thread_safe else nullcontext()
+        hits = misses = evictions = 0
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            nonlocal hits, misses, evictions
+            key = args + (_KWARGS_MARK, *sorted(kwargs.items())) if kwargs else args
+            with lock:
+                entry = cache.get(key)
+                if entry is not None:
+                    result, expires = entry
+                    if expires is None or time.monotonic() < expires:
+                        hits += 1
+                        if maxsize is not None:
+                            cache.move_to_end(key)
+                        return result
+                    del cache[key]
+                    evictions += 1
+                misses += 1
+
+            result = func(*args, **kwargs)
+
+            with lock:
+                cache[key] = (result, time.monotonic() + ttl if ttl is not None else None)
+                if maxsize is not None:
+                    cache.move_to_end(key)
+                    while len(cache) > maxsize:
+                        cache.popitem(last=False)
+                        evictions += 1
+            return result
+
+        def cache_info() -> CacheInfo:
+            with lock:
+                return CacheInfo(hits, misses, evictions, maxsize, len(cache))
+
+        def cache_clear() -> None:
+            nonlocal hits, misses, evictions
+            with lock:
+                cache.clear()
+                hits = misses = evictions = 0
+
+        wrapper.cache_info = cache_info
+        wrapper.cache_clear = cache_clear
+        return wrapper
+
+    if func is not None:
+        return decorator(func)
+    return decorator
 
 
 @cache_decorator
@@ -94,15 +386,286 @@ def fibonacci(n: int) -> int:
     return fibonacci(n - 1) + fibonacci(n - 2)
 
 
+# Подкорзин на каждую степень двойки: относительная ошибка квантилей до ~19 %
+_SUB_BUCKETS = 4
+_SUB_BITS = 2
+# Сколько длительностей копится до раскладки по корзинам
+_FOLD_SIZE = 1024
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+def _bucket_index(ns: int) -> int:
+    """Логарифмическая корзина для длительности в наносекундах"""
+    bits = ns.bit_length()
+    if bits <= _SUB_BITS + 1:
+        return ns
+    shift = bits - _SUB_BITS - 1
+    return shift * _SUB_BUCKETS + (ns >> shift)
+
+
+def _bucket_upper(index: int) -> int:
+    """Верхняя граница корзины (не включительно), нс"""
+    if index < 2 * _SUB_BUCKETS:
+        return index + 1
+    shift, mantissa = divmod(index, _SUB_BUCKETS)
+    shift -= 1
+    return (mantissa + _SUB_BUCKETS + 1) << shift
+
+
+class FunctionMetrics:
+    """Счётчики и гистограмма длительностей одной функции.
+
+    record только дописывает длительность в список (атомарно при GIL);
+    в корзины гистограммы они раскладываются пачками по _FOLD_SIZE,
+    поэтому на горячем пути нет блокировок.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.calls = 0
+        self.errors = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self.buckets: dict[int, int] = {}
+        self.profile = None
+        self.lock = Lock()
+        self._pending: list[int] = []
+
+    def record(self, ns: int) -> None:
+        pending = self._pending
+        pending.append(ns)
+        if len(pending) >= _FOLD_SIZE:
+            self.fold()
+
+    def record_error(self, ns: int) -> None:
+        with self.lock:
+            self.errors += 1
+        self.record(ns)
+
+    def fold(self) -> None:
+        """Разложить накопленные длительности по корзинам"""
+        with self.lock:
+            pending = self._pending
+            n = len(pending)
+            if not n:
+                return
+            chunk = pending[:n]
+            # Срез и удаление — по одной операции, дописанное после len не теряется
+            del pending[:n]
+            for index, count in Counter(map(_bucket_index, chunk)).items():
+                self.buckets[index] = self.buckets.get(index, 0) + count
+            self.calls += n
+            self.total_ns += sum(chunk)
+            self.max_ns = max(self.max_ns, max(chunk))
+
+    def quantile(self, q: float) -> float:
+        """Оценка квантиля в секундах — верхняя граница нужной корзины"""
+        self.fold()
+        with self.lock:
+            buckets = sorted(self.buckets.items())
+            rank = q * self.calls
+        seen = 0
+        for index, count in buckets:
+            seen += count
+            if seen >= rank:
+                return min(_bucket_upper(index), self.max_ns) / 1e9
+        return 0.0
+
+    def snapshot(self) -> dict:
+        self.fold()
+        with self.lock:
+            buckets = sorted(self.buckets.items())
+            data = {
+                "calls": self.calls,
+                "errors": self.errors,
+                "total_seconds": self.total_ns / 1e9,
+                "max_seconds": self.max_ns / 1e9,
+            }
+        data.update({f"p{round(q * 100)}": self.quantile(q) for q in QUANTILES})
+        data["buckets"] = [[_bucket_upper(index) / 1e9, count] for index, count in buckets]
+        return data
+
+
+class MetricsRegistry:
+    """Метрики всех функций процесса и их выгрузка в Prometheus/JSON"""
 
-result = calculate(10, 5, "+")
-print(f"Результат calculate(10, 5, '+'): {result}")
+    def __init__(self) -> None:
+        self.functions: dict[str, FunctionMetrics] = {}
+        self._lock = Lock()
+
+    def get(self, name: str) -> FunctionMetrics:
+        with self._lock:
+            if name not in self.functions:
+                self.functions[name] = FunctionMetrics(name)
+            return self.functions[name]
+
+    def reset(self) -> None:
+        with self._lock:
+            self.functions.clear()
+
+    def to_json(self) -> str:
+        return json.dumps({name: metrics.snapshot() for name, metrics in self.functions.items()},
+                          ensure_ascii=False, indent=2)
+
+    def to_prometheus(self) -> str:
+        snapshots = {name: metrics.snapshot() for name, metrics in self.functions.items()}
+        lines = ["# TYPE function_calls_total counter"]
+        lines += [f'function_calls_total{{function="{name}"}} {data["calls"]}'
+                  for name, data in snapshots.items()]
+        lines.append("# TYPE function_errors_total counter")
+        lines += [f'function_errors_total{{function="{name}"}} {data["errors"]}'
+                  for name, data in snapshots.items()]
+        lines.append("# TYPE function_latency_seconds histogram")
+        for name, data in snapshots.items():
+            seen = 0
+            for upper, count in data["buckets"]:
+                seen += count
+                lines.append(f'function_latency_seconds_bucket{{function="{name}",le="{upper:.9g}"}} {seen}')
+            lines.append(f'function_latency_seconds_bucket{{function="{name}",le="+Inf"}} {data["calls"]}')
+            lines.append(f'function_latency_seconds_sum{{function="{name}"}} {data["total_seconds"]:.9g}')
+            lines.append(f'function_latency_seconds_count{{function="{name}"}} {data["calls"]}')
+        lines.append("# TYPE function_latency_quantile_seconds gauge")
+        for name, data in snapshots.items():
+            lines += [f'function_latency_quantile_seconds{{function="{name}",quantile="{q}"}} '
+                      f'{data[f"p{round(q * 100)}"]:.9g}' for q in QUANTILES]
+        return "\n".join(lines) + "\n"
+
+    def export(self, filename: str) -> None:
+        """Запись в файл: .json — JSON, иначе текстовый формат Prometheus"""
+        text = self.to_json() if str(filename).endswith(".json") else self.to_prometheus()
+        with open(filename, "w", encoding="utf-8") as f:
+            f.write(text)
+
+    def dump_profiles(self, directory: str) -> list[str]:
+        """Сохранить накопленные профили в <directory>/<функция>.prof"""
+        paths = []
+        for name, metrics in self.functions.items():
+            if metrics.profile is not None:
+                path = os.path.join(directory, f"{name}.prof")
+                metrics.profile.dump_stats(path)
+                paths.append(path)
+        return paths
+
+
+metrics_registry = MetricsRegistry()
+# cProfile один на интерпретатор (с 3.12): под профилем идёт не больше одного вызова
+_profile_lock = Lock()
+perf_counter_ns = time.perf_counter_ns
+
+
+def metrics_decorator(func: Callable | None = None, *, name: str | None = None,
+                      registry: MetricsRegistry | None = None,
+                      profile_every: int | None = None) -> Callable:
+    """Число вызовов, ошибок и гистограмма длительностей функции в памяти.
+
+    Длительность — по time.perf_counter_ns, корзины логарифмические
+    (по четыре на степень двойки), отсюда p50/p95/p99. profile_every=N
+    запускает каждый N-й вызов под cProfile; профили копятся в
+    FunctionMetrics.profile и выгружаются MetricsRegistry.dump_profiles.
+    Как и cache_decorator, пишется с параметрами и без.
+    """
+    def decorator(func: Callable) -> Callable:
+        metrics = (registry or metrics_registry).get(name or f"{func.__module__}.{func.__qualname__}")
+        record, record_error = metrics.record, metrics.record_error
+        counter = itertools.count(1)
+
+        def profiled(args: tuple, kwargs: dict) -> Any:
+            # Профиль уже снимается (в другом потоке или выше по стеку) — вызов без него
+            if not _profile_lock.acquire(blocking=False):
+                return func(*args, **kwargs)
+            try:
+                if metrics.profile is None:
+                    metrics.profile = cProfile.Profile()
+                profile = metrics.profile
+                try:
+                    profile.enable()
+                except ValueError:
+                    # Активен чужой профилировщик, например python -m cProfile
+                    return func(*args, **kwargs)
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    profile.disable()
+            finally:
+                _profile_lock.release()
+
+        if profile_every:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                sample = next(counter) % profile_every == 0
+                t0 = perf_counter_ns()
+                try:
+                    result = profiled(args, kwargs) if sample else func(*args, **kwargs)
+                except BaseException:
+                    record_error(perf_counter_ns() - t0)
+                    raise
+                record(perf_counter_ns() - t0)
+                return result
+        else:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                t0 = perf_counter_ns()
+                try:
+                    result = func(*args, **kwargs)
+                except BaseException:
+                    record_error(perf_counter_ns() - t0)
+                    raise
+                record(perf_counter_ns() - t0)
+                return result
+
+        wrapper.metrics = metrics
+        return wrapper
+
+    if func is not None:
+        return decorator(func)
+    return decorator
+
+
+def instrument(module: Any, names: list[str], **options: Any) -> list[str]:
+    """Обернуть metrics_decorator функции модуля по именам.
+
+    Заменяются атрибуты модуля и значения его словарей-реестров (вроде
+    INTERPOLATORS), поэтому учитываются и вызовы из самого модуля.
+    Ссылки, сохранённые в других местах, остаются без метрик; в уже
+    запущенные процессы-обработчики замена не попадает. Возвращает
+    обёрнутые имена.
+    """
+    registries = [value for value in vars(module).values() if isinstance(value, dict)]
+    wrapped = []
+    for attr in names:
+        func = getattr(module, attr, None)
+        if not callable(func) or hasattr(func, "metrics"):
+            continue
+        decorated = metrics_decorator(func, **options)
+        setattr(module, attr, decorated)
+        for registry in registries:
+            for key, value in registry.items():
+                if value is func:
+                    registry[key] = decorated
+        wrapped.append(attr)
+    return wrapped
+
+
+if __name__ == "__main__":
+    result = calculate(10, 5, "+")
+    print(f"Результат calculate(10, 5, '+'): {result}")
+
+    for i in range(5):
+        print(f"Попытка отправки сообщения #{i+1}")
+        try:
+            send_message("Привет!")
+        except RateLimitExceeded as e:
+            print(e)
 
-for i in range(5):
-    print(f"Попытка отправки сообщения #{i+1}")
-    send_message("Привет!")
+    print(f"Вызов fibonacci(10): {fibonacci(10)}")
+    print(f"Повторный вызов fibonacci(10): {fibonacci(10)}")
+    print(f"Вызов fibonacci(8): {fibonacci(8)}")
+    print(f"Повторный вызов fibonacci(8): {fibonacci(8)}")
+    print(f"Статистика кэша fibonacci: {fibonacci.cache_info()}")
 
-print(f"Вызов fibonacci(10): {fibonacci(10)}")
-print(f"Повторный вызов fibonacci(10): {fibonacci(10)}")
-print(f"Вызов fibonacci(8): {fibonacci(8)}")
-print(f"Повторный вызов fibonacci(8): {fibonacci(8)}")
\ No newline at end of file
+    timed_calculate = metrics_decorator(calculate.__wrapped__, name="calculate")
+    for i in range(1000):
+        timed_calculate(i, 3, "*")
+    stats = timed_calculate.metrics.snapshot()
+    print(f"Метрики calculate: {stats['calls']} вызовов, "
+          f"p50={stats['p50'] * 1e6:.2f} мкс, p99={stats['p99'] * 1e6:.2f} мкс")
@@ -1,20 +1,287 @@
 import os
+import sys
 import random
 import asyncio
+import sqlite3
+import logging
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from aiogram import Bot, Dispatcher, types, F
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.filters import Command
 from aiogram.enums import ParseMode
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from aiohttp import web
 from dotenv import load_dotenv
 
 load_dotenv()
 API_TOKEN = os.getenv("API_TOKEN")
 
+STATS_BACKEND = os.getenv("STATS_BACKEND", "memory")
+STATS_DB = os.getenv("STATS_DB", "stats.sqlite3")
+
+WEBHOOK_URL = os.getenv("WEBHOOK_URL")  # публичный адрес, например https://example.com
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/webhook")
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET") or None
+WEBHOOK_HOST = os.getenv("WEBHOOK_HOST", "0.0.0.0")
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8080"))
+
 bot = Bot(token=API_TOKEN)
 dp = Dispatcher()
 
 stats = {}
 
+RESULT_FIELDS = {"win": "wins", "lose": "losses", "draw": "draws"}
+
+
+class StatsStore(ABC):
+    """Хранилище статистики игроков с асинхронным интерфейсом"""
+
+    async def start(self):
+        pass
+
+    async def close(self):
+        pass
+
+    @abstractmethod
+    async def get(self, user_id):
+        """Статистика игрока: словарь wins, losses, draws"""
+
+    @abstractmethod
+    async def record(self, user_id, result):
+        """Учесть результат игры: win, lose или draw"""
+
+
+class MemoryStatsStore(StatsStore):
+    """Статистика в словаре процесса — теряется при перезапуске"""
+
+    def __init__(self, data):
+        self.data = data
+
+    async def get(self, user_id):
+        return dict(self.data.get(user_id, {"wins": 0, "losses": 0, "draws": 0}))
+
+    async def record(self, user_id, result):
+        user_stats = self.data.setdefault(user_id, {"wins": 0, "losses": 0, "draws": 0})
+        user_stats[RESULT_FIELDS[result]] += 1
+
+
+class SQLiteStatsStore(StatsStore):
+    """Статистика в SQLite (WAL), общая для нескольких процессов бота.
+
+    record() только увеличивает счётчики в памяти; накопленное пишется
+    одной транзакцией раз в flush_interval секунд или при batch_size
+    изменённых игроках. Все обращения к базе идут в отдельном потоке,
+    поэтому цикл событий не блокируется. Запись — инкрементом
+    (wins = wins + ?), так что процессы не затирают данные друг друга.
+    Пачка, которую не удалось записать, возвращается в очередь и уходит
+    со следующей.
+    """
+
+    def __init__(self, path, flush_interval=1.0, batch_size=1000):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._pending = defaultdict(lambda: [0, 0, 0])
+        # Пачка, которая сейчас пишется: её нет ни в базе, ни в _pending
+        self._in_flight = {}
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="stats-db")
+        self._conn = None
+        self._flush_task = None
+        self._flush_now = asyncio.Event()
+
+    async def _run(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    def _connect(self):
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS stats ("
+                           "user_id INTEGER PRIMARY KEY, "
+                           "wins INTEGER NOT NULL DEFAULT 0, "
+                           "losses INTEGER NOT NULL DEFAULT 0, "
+                           "draws INTEGER NOT NULL DEFAULT 0)")
+        self._conn.commit()
+
+    def _select(self, user_id):
+        row = self._conn.execute("SELECT wins, losses, draws FROM stats WHERE user_id = ?",
+                                 (user_id,)).fetchone() or (0, 0, 0)
+        # В том же потоке, что и _write: пачка учтена либо в базе, либо здесь
+        in_flight = self._in_flight.get(user_id, (0, 0, 0))
+        return tuple(stored + flying for stored, flying in zip(row, in_flight))
+
+    def _write(self, rows):
+        with self._conn:
+            self._conn.executemany(
+                "INSERT INTO stats (user_id, wins, losses, draws) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(user_id) DO UPDATE SET "
+                "wins = wins + excluded.wins, "
+                "losses = losses + excluded.losses, "
+                "draws = draws + excluded.draws",
+                rows
+            )
+        self._in_flight = {}
+
+    async def start(self):
+        await self._run(self._connect)
+        self._flush_task = asyncio.create_task(self._flush_loop())
+
+    async def close(self):
+        if self._flush_task:
+            self._flush_task.cancel()
+            self._flush_task = None
+        try:
+            await self.flush()
+        finally:
+            if self._conn:
+                await self._run(self._conn.close)
+                self._conn = None
+            self._executor.shutdown()
+
+    async def flush(self):
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, defaultdict(lambda: [0, 0, 0])
+        self._in_flight = pending
+        try:
+            await self._run(self._write, [(user_id, *counts) for user_id, counts in pending.items()])
+        except Exception:
+            # Пачка не записана (например, database is locked) — вернём её в очередь
+            for user_id, counts in pending.items():
+                merged = self._pending[user_id]
+                for i, count in enumerate(counts):
+                    merged[i] += count
+            self._in_flight = {}
+            raise
+
+    async def _flush_loop(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._flush_now.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_now.clear()
+            try:
+                await self.flush()
+            except Exception:
+                logging.exception("Не удалось записать статистику в %s, повторим позже", self.path)
+
+    async def get(self, user_id):
+        wins, losses, draws = await self._run(self._select, user_id)
+        if user_id in self._pending:
+            pending = self._pending[user_id]
+            wins, losses, draws = wins + pending[0], losses + pending[1], draws + pending[2]
+        return {"wins": wins, "losses": losses, "draws": draws}
+
+    async def record(self, user_id, result):
+        self._pending[user_id][("win", "lose", "draw").index(result)] += 1
+        if len(self._pending) >= self.batch_size:
+            self._flush_now.set()
+
+
+def make_stats_store(backend):
+    if backend == "sqlite":
+        return SQLiteStatsStore(STATS_DB)
+    return MemoryStatsStore(stats)
+
+
+stats_store = make_stats_store(STATS_BACKEND)
+dp.startup.register(stats_store.start)
+dp.shutdown.register(stats_store.close)
+
+
+class OutboundQueue:
+    """Очередь исходящих сообщений с темпом отправки и склейкой.
+
+    В каждый чат уходит не чаще одного сообщения в per_chat_interval
+    секунд, во все чаты вместе — не больше global_rate в секунду. Тексты,
+    накопившиеся для чата за время ожидания, склеиваются в одно сообщение
+    (до max_length символов). Обработчик только ставит текст в очередь.
+    """
+
+    def __init__(self, per_chat_interval=1.0, global_rate=30.0, max_length=4096):
+        self.per_chat_interval = per_chat_interval
+        self.global_interval = 1 / global_rate
+        self.max_length = max_length
+        self._pending = {}
+        self._workers = {}
+        self._last_sent = {}
+        self._next_global = 0.0
+        self._counters = {"enqueued": 0, "sent": 0, "coalesced": 0, "errors": 0, "max_depth": 0}
+
+    def send(self, bot, chat_id, text):
+        pending = self._pending.setdefault(chat_id, [])
+        pending.append(text)
+        self._counters["enqueued"] += 1
+        self._counters["max_depth"] = max(self._counters["max_depth"], len(pending))
+        if chat_id not in self._workers:
+            self._workers[chat_id] = asyncio.create_task(self._drain(bot, chat_id))
+
+    def metrics(self):
+        return {
+            **self._counters,
+            "queued": sum(len(texts) for texts in self._pending.values()),
+            "active_chats": len(self._workers),
+        }
+
+    async def close(self):
+        while self._workers:
+            await asyncio.gather(*self._workers.values())
+
+    def _coalesce(self, texts):
+        messages = [texts[0]]
+        for text in texts[1:]:
+            if len(messages[-1]) + 2 + len(text) <= self.max_length:
+                messages[-1] += "\n\n" + text
+            else:
+                messages.append(text)
+        return messages
+
+    async def _wait_slot(self, chat_id):
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        chat_slot = self._last_sent.get(chat_id, -self.per_chat_interval) + self.per_chat_interval
+        slot = max(now, chat_slot, self._next_global)
+        self._next_global = slot + self.global_interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    async def _drain(self, bot, chat_id):
+        try:
+            while self._pending.get(chat_id):
+                await self._wait_slot(chat_id)
+                texts = self._pending.pop(chat_id)
+                messages = self._coalesce(texts)
+                self._counters["coalesced"] += len(texts) - len(messages)
+                for i, text in enumerate(messages):
+                    if i:
+                        await self._wait_slot(chat_id)
+                    try:
+                        await bot.send_message(chat_id, text)
+                        self._counters["sent"] += 1
+                    except Exception:
+                        self._counters["errors"] += 1
+                        logging.exception("Не удалось отправить сообщение в чат %s", chat_id)
+                    self._last_sent[chat_id] = asyncio.get_running_loop().time()
+        finally:
+            del self._workers[chat_id]
+            # Время последней отправки нужно следующему обработчику чата, чтобы
+            # выдержать интервал; забываем его, только когда интервал истёк
+            if chat_id in self._last_sent:
+                asyncio.get_running_loop().call_later(
+                    self.per_chat_interval, self._forget, chat_id, self._last_sent[chat_id])
+
+    def _forget(self, chat_id, sent_at):
+        if chat_id not in self._workers and self._last_sent.get(chat_id) == sent_at:
+            del self._last_sent[chat_id]
+
+
+outbound = OutboundQueue()
+dp.shutdown.register(outbound.close)
+
 choice_kb = InlineKeyboardMarkup(inline_keyboard=[
     [
         InlineKeyboardButton(text="Камень", callback_data="rock"),
@@ -35,7 +302,7 @@ async def play_handler(message: types.Message):
 @dp.message(Command("stats"))
 async def stats_handler(message: types.Message):
     user_id = message.from_user.id
-    user_stats = stats.get(user_id, {"wins": 0, "losses": 0, "draws": 0})
+    user_stats = await stats_store.get(user_id)
     await message.answer(f"Ваша статистика:\n"
                          f"Побед: {user_stats['wins']}\n"
                          f"Поражений: {user_stats['losses']}\n"
@@ -44,24 +311,12 @@ async def stats_handler(message: types.Message):
 @dp.callback_query(F.data.in_({"rock", "scissors", "paper"}))
 async def callback_handler(callback: types.CallbackQuery):
     user_choice = callback.data
-    bot_choice = random.choice(["rock", "scissors", "paper"])
-    result = get_result(user_choice, bot_choice)
-
-    user_id = callback.from_user.id
-    stats.setdefault(user_id, {"wins": 0, "losses": 0, "draws": 0})
-    if result == "win":
-        stats[user_id]["wins"] += 1
-        msg = "Вы выиграли! 🎉"
-    elif result == "lose":
-        stats[user_id]["losses"] += 1
-        msg = "Вы проиграли. 😢"
-    else:
-        stats[user_id]["draws"] += 1
-        msg = "Ничья. 🤝"
+    bot_choice = random.choice(CHOICES)
+    result, reply = REPLIES[user_choice, bot_choice]
 
-    await callback.message.answer(
-        f"Вы: {translate(user_choice)}\nБот: {translate(bot_choice)}\n{msg}"
-    )
+    # Результат уходит через очередь параллельно с ответом на нажатие
+    outbound.send(callback.bot, callback.message.chat.id, reply)
+    await stats_store.record(callback.from_user.id, result)
     await callback.answer()
 
 def get_result(player, bot):
@@ -74,11 +329,43 @@ def get_result(player, bot):
     else:
         return "lose"
 
+CHOICES = ["rock", "scissors", "paper"]
+CHOICE_NAMES = {"rock": "Камень", "scissors": "Ножницы", "paper": "Бумага"}
+RESULT_MESSAGES = {"win": "Вы выиграли! 🎉", "lose": "Вы проиграли. 😢", "draw": "Ничья. 🤝"}
+
 def translate(choice):
-    return {"rock": "Камень", "scissors": "Ножницы", "paper": "Бумага"}[choice]
+    return CHOICE_NAMES[choice]
+
+# Все девять исходов известны заранее: текст ответа собирается один раз
+REPLIES = {
+    (player, bot_choice): (
+        get_result(player, bot_choice),
+        f"Вы: {translate(player)}\nБот: {translate(bot_choice)}\n"
+        f"{RESULT_MESSAGES[get_result(player, bot_choice)]}"
+    )
+    for player in CHOICES for bot_choice in CHOICES
+}
 
 async def main():
     await dp.start_polling(bot)
 
+async def on_webhook_startup(bot: Bot):
+    await bot.set_webhook(f"{WEBHOOK_URL}{WEBHOOK_PATH}", secret_token=WEBHOOK_SECRET,
+                          drop_pending_updates=True)
+
+def webhook_main():
+    """Приём обновлений через webhook на aiohttp вместо long polling"""
+    if not WEBHOOK_URL:
+        sys.exit("Для --webhook задайте WEBHOOK_URL — публичный адрес бота, например https://example.com")
+    dp.startup.register(on_webhook_startup)
+    app = web.Application()
+    SimpleRequestHandler(dispatcher=dp, bot=bot, secret_token=WEBHOOK_SECRET).register(app, path=WEBHOOK_PATH)
+    app.router.add_get("/metrics", lambda request: web.json_response(outbound.metrics()))
+    setup_application(app, dp, bot=bot)
+    web.run_app(app, host=WEBHOOK_HOST, port=WEBHOOK_PORT)
+
 if __name__ == "__main__":
-    asyncio.run(main())
+    if "--webhook" in sys.argv[1:]:
+        webhook_main()
+    else:
+        asyncio.run(main())
@@ -0,0 +1,79 @@
+"""Единая точка входа: python-analytic <команда> [аргументы команды].
+
+Модули лабораторных импортируются только для выбранной команды, поэтому
+lab1 не платит за импорт pandas и matplotlib, а gm — за pyplot, пока
+график не строится.
+"""
+import os
+import sys
+import argparse
+from importlib import import_module
+
+# Команда -> (модуль с функцией main(argv), описание)
+COMMANDS = {
+    'lab1': ('lab1.main', 'статистика, производная и площадь для yc-*.dat'),
+    'gm': ('gm.main', 'интерполяция таблично заданной функции'),
+    'lab2': ('lab2.main', 'графики по продажам'),
+}
+
+# Функции, которые --metrics оборачивает metrics_decorator из lab3. Генераторы
+# (read_data_chunks) не годятся: обёртка измерила бы только создание генератора
+INSTRUMENTED = {
+    'lab1': ['load_data', 'load_cached', 'compute_stats', 'get_derivative', 'calculate_area',
+             'compute_stats_batch', 'get_derivative_batch', 'calculate_area_batch',
+             'write_output', 'process_file'],
+    'gm': ['read_data', 'linear_interpolation_np', 'quadratic_interpolation_np',
+           'cubic_spline_interpolation', 'piecewise_quadratic_interpolation',
+           'plot_interpolation', 'save_results', 'save_results_npz', 'interpolate_file_stream'],
+}
+
+# Параметр и значение, при которых команда считает в дочерних процессах: их вызовы
+# идут мимо обёрток родителя, и --metrics покажет для этих функций нули
+WORKER_PROCESSES = {
+    'lab1': ('--mode', 'process'),
+}
+
+def runs_in_workers(command, argv):
+    if command not in WORKER_PROCESSES:
+        return False
+    option, value = WORKER_PROCESSES[command]
+    probe = argparse.ArgumentParser(add_help=False)
+    probe.add_argument(option)
+    known, _ = probe.parse_known_args(argv)
+    return getattr(known, option.lstrip('-').replace('-', '_')) == value
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python-analytic',
+        description='Лабораторные работы python-analytic',
+        epilog='\n'.join(f"{name}: {help}" for name, (_, help) in COMMANDS.items()),
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('--metrics', metavar='FILE',
+                        help="собрать метрики функций команды в FILE (.json или формат Prometheus)")
+    parser.add_argument('--profile-every', type=int, metavar='N',
+                        help="с --metrics: каждый N-й вызов под cProfile, профили рядом с FILE")
+    parser.add_argument('command', choices=COMMANDS, help="команда; её параметры: <команда> --help")
+    parser.add_argument('args', nargs=argparse.REMAINDER, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    module = import_module(COMMANDS[args.command][0])
+    if not args.metrics:
+        return module.main(args.args)
+
+    from lab3.main import instrument, metrics_registry
+
+    if runs_in_workers(args.command, args.args):
+        option, value = WORKER_PROCESSES[args.command]
+        print(f"Внимание: с {option} {value} функции выполняются в дочерних процессах, "
+              f"их вызовы в {args.metrics} не попадут", file=sys.stderr)
+    instrument(module, INSTRUMENTED.get(args.command, []), profile_every=args.profile_every)
+    try:
+        return module.main(args.args)
+    finally:
+        metrics_registry.export(args.metrics)
+        profiles = metrics_registry.dump_profiles(os.path.dirname(os.path.abspath(args.metrics)))
+        print(f"Метрики сохранены в {args.metrics}" + (f", профили: {len(profiles)}" if profiles else ""))
+
+if __name__ == '__main__':
+    sys.exit(main())